@@ -0,0 +1,191 @@
+"""
+Persistent HTTP response cache for the player and team sources.
+
+Rosters change rarely, so players.py and players_ingestion.py keep every
+successful GET in a SQLite file keyed by URL, query parameters and request
+headers. A fresh entry is returned without touching the network. A stale one
+is revalidated with If-None-Match / If-Modified-Since, and a 304 only renews
+its lifetime. The file is kept under a size limit by evicting the least
+recently used responses.
+
+Configured with environment variables:
+
+    HTTP_CACHE_PATH    cache file (default .http_cache.sqlite; empty disables it)
+    HTTP_CACHE_TTL     seconds a response is served without revalidation (default 21600)
+    HTTP_CACHE_MAX_MB  size limit of the cached bodies (default 256)
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from cron.scraper.http_client import get_client
+
+DEFAULT_PATH = os.getenv("HTTP_CACHE_PATH", ".http_cache.sqlite")
+DEFAULT_TTL = float(os.getenv("HTTP_CACHE_TTL", str(6 * 60 * 60)))
+DEFAULT_MAX_BYTES = int(float(os.getenv("HTTP_CACHE_MAX_MB", "256")) * 1024 * 1024)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL
+)
+"""
+
+# Describe the raw transfer, not the decoded body that is stored
+_TRANSFER_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+# Fetch function: (url, params, headers) -> response
+Fetch = Callable[[str, Optional[Dict], Dict[str, str]], requests.Response]
+
+
+def _cache_key(url: str, params: Optional[Dict], headers: Optional[Dict[str, str]]) -> str:
+    # Request headers are part of the key so responses for different API keys never mix
+    prepared = requests.Request("GET", url, params=sorted((params or {}).items())).prepare()
+    parts = [prepared.url] + [f"{k.lower()}:{v}" for k, v in sorted((headers or {}).items())]
+    return hashlib.blake2b("\n".join(parts).encode(), digest_size=16).hexdigest()
+
+
+def _response(url: str, headers: str, body: bytes) -> requests.Response:
+    """Rebuild a 200 response from a cache row"""
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response.headers = CaseInsensitiveDict(json.loads(headers))
+    response._content = body
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.from_cache = True
+    return response
+
+
+class HttpCache:
+    """GET responses cached on disk, with TTLs, conditional revalidation and LRU eviction"""
+
+    def __init__(self, path: str = DEFAULT_PATH, ttl: float = DEFAULT_TTL, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0            # Served without a request
+        self.revalidated = 0     # Served after a 304
+        self.misses = 0          # Downloaded in full
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(SCHEMA)
+        self._conn.commit()
+
+    @classmethod
+    def from_env(cls) -> Optional["HttpCache"]:
+        """The cache configured by HTTP_CACHE_*, or None when HTTP_CACHE_PATH is empty"""
+        return cls() if DEFAULT_PATH else None
+
+    def get(self, url: str, params: Optional[Dict] = None, headers: Optional[Dict[str, str]] = None,
+            fetch: Optional[Fetch] = None, ttl: Optional[float] = None) -> requests.Response:
+        """
+        GET a URL through the cache.
+
+        Args:
+            url (str): URL without query string
+            params (Optional[Dict]): Query parameters
+            headers (Optional[Dict[str, str]]): Request headers
+            fetch (Optional[Fetch]): Performs the request on a miss or revalidation,
+                e.g. to apply rate limiting; defaults to the shared HTTP client
+            ttl (Optional[float]): Seconds the response stays fresh (default: the cache's ttl)
+
+        Returns:
+            requests.Response: The server's response, or a rebuilt 200 with
+                `from_cache = True`. Non-200 responses are returned as-is and
+                never stored.
+        """
+        key = _cache_key(url, params, headers)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, headers, body, etag, last_modified, expires_at FROM responses WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if row is not None and row[5] > now:
+                self._touch(key, now)
+                self.hits += 1
+                return _response(row[0], row[1], row[2])
+
+        request_headers = dict(headers or {})
+        if row is not None:
+            if row[3]:
+                request_headers["If-None-Match"] = row[3]
+            if row[4]:
+                request_headers["If-Modified-Since"] = row[4]
+
+        fetch = fetch or (lambda u, p, h: get_client().get(u, params=p, headers=h))
+        response = fetch(url, params, request_headers)
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+
+        if response.status_code == 304 and row is not None:
+            with self._lock:
+                self._conn.execute("UPDATE responses SET expires_at = ?, accessed_at = ? WHERE key = ?",
+                                   (expires_at, now, key))
+                self._conn.commit()
+                self.revalidated += 1
+            return _response(row[0], row[1], row[2])
+
+        if response.status_code == 200 and "no-store" not in response.headers.get("Cache-Control", ""):
+            self._store(key, url, response, expires_at, now)
+        with self._lock:
+            self.misses += 1
+        return response
+
+    def _store(self, key: str, url: str, response: requests.Response, expires_at: float, now: float) -> None:
+        body = response.content
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in _TRANSFER_HEADERS}
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, url, headers, body, etag, last_modified, expires_at, accessed_at, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, response.url or url, json.dumps(headers), body,
+                 response.headers.get("ETag"), response.headers.get("Last-Modified"),
+                 expires_at, now, len(body))
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _touch(self, key: str, now: float) -> None:
+        self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        self._conn.commit()
+
+    def _evict(self) -> None:
+        """Drop least recently used responses until the bodies fit in max_bytes"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall():
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def summary(self) -> str:
+        return f"{self.hits} cached, {self.revalidated} revalidated, {self.misses} downloaded"
@@ -0,0 +1,168 @@
+"""
+Local ingest server for the resources described in scraper/openapi.yaml.
+
+Serves /{resource}/insert, /{resource}/bulk_insert, /{resource}/query_by_id,
+/{resource}/latest and /odds/current over the payload models in
+cron/models.py, backed by the SQLite schema in cron/storage.py. Run from the
+repository root:
+
+    python -m cron.ingest_server --port 8000 --db cron/ballknower.db
+"""
+import argparse
+import json
+import logging
+import sqlite3
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from pydantic import ValidationError
+
+from cron.models import validate_batch
+from cron.odds_history import OddsHistory
+from cron.storage import DEFAULT_DB_PATH, RESOURCES, connect, init_db, insert_many, latest_odds
+
+logger = logging.getLogger(__name__)
+
+
+class IngestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    db_path = DEFAULT_DB_PATH
+    history: Optional[OddsHistory] = None  # Also receives every odds batch when set
+    _local = threading.local()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # One connection per handler thread; SQLite serialises the writers
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect(self.db_path)
+        return conn
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status: int, body: Any) -> None:
+        data = json.dumps(body, default=str).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _route(self) -> Tuple[Optional[str], str, Dict[str, List[str]]]:
+        url = urlparse(self.path)
+        parts = url.path.strip("/").split("/")
+        if len(parts) != 2 or parts[0] not in RESOURCES:
+            return None, "", {}
+        return parts[0], parts[1], parse_qs(url.query)
+
+    def _read_json(self) -> Any:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"null")
+
+    def do_POST(self):
+        resource, action, _ = self._route()
+        if resource is None or action not in ("insert", "bulk_insert"):
+            return self._reply(404, {"error": "Not found"})
+        try:
+            body = self._read_json()
+        except ValueError as e:
+            return self._reply(400, {"error": f"Invalid JSON: {str(e)}"})
+
+        if action == "insert":
+            if not isinstance(body, dict):
+                return self._reply(400, {"error": "Expected a JSON object"})
+            body = [body]
+        elif not isinstance(body, list):
+            return self._reply(400, {"error": "Expected a JSON array"})
+
+        try:
+            items = validate_batch(RESOURCES[resource], body)
+        except ValidationError as e:
+            # Nothing is written unless the whole batch is valid
+            return self._reply(422, {"error": json.loads(e.json())})
+
+        try:
+            inserted = insert_many(self.conn, resource, items)
+        except sqlite3.IntegrityError as e:
+            # e.g. a username or email that is already taken
+            return self._reply(409, {"error": str(e)})
+        if resource == "odds" and self.history is not None:
+            # The odds are already committed, so failing the request here would only
+            # make the client resend them and insert them twice; the history just misses this batch
+            try:
+                self.history.append(items)
+            except Exception as e:
+                logger.error(f"Failed to append {len(items)} odds to the history: {str(e)}")
+        if action == "insert":
+            row_id = self.conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            return self._reply(200, {"id": row_id})
+        self._reply(200, {"inserted": inserted})
+
+    def do_GET(self):
+        resource, action, query = self._route()
+        if resource is None:
+            return self._reply(404, {"error": "Not found"})
+        try:
+            if action == "query_by_id":
+                row = self.conn.execute(f"SELECT * FROM {resource} WHERE id = ?",
+                                        (int(query["id"][0]),)).fetchone()
+                if row is None:
+                    return self._reply(404, {"error": "Record not found"})
+                return self._reply(200, dict(row))
+            if action == "current" and resource == "odds":
+                filters = {name: query[name][0] for name in ("book_id", "stat", "player_id", "game_id")
+                           if name in query}
+                for name in ("book_id", "player_id", "game_id"):
+                    if name in filters:
+                        filters[name] = int(filters[name])
+                return self._reply(200, latest_odds(self.conn, **filters))
+            if action == "latest":
+                limit = int(query.get("limit", ["10"])[0])
+                rows = self.conn.execute(f"SELECT * FROM {resource} ORDER BY id DESC LIMIT ?",
+                                         (limit,)).fetchall()
+                return self._reply(200, [dict(row) for row in rows])
+        except (KeyError, ValueError):
+            return self._reply(400, {"error": "Missing or invalid query parameter"})
+        self._reply(404, {"error": "Not found"})
+
+
+def serve(host: str = "0.0.0.0", port: int = 8000, db_path: str = DEFAULT_DB_PATH,
+          history_path: Optional[str] = None) -> ThreadingHTTPServer:
+    """Create the tables and return a server ready for serve_forever()"""
+    conn = connect(db_path)
+    init_db(conn)
+    conn.close()
+    history = OddsHistory(history_path) if history_path else None
+    handler = type("BoundIngestHandler", (IngestHandler,),
+                   {"db_path": db_path, "history": history, "_local": threading.local()})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    parser = argparse.ArgumentParser(description="Serve the ingest API over a local SQLite database.")
+    parser.add_argument("--host", default="0.0.0.0", help="Address to bind (default: 0.0.0.0)")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on (default: 8000)")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="SQLite database path (default: cron/ballknower.db)")
+    parser.add_argument("--odds-history", help="Also append every odds batch to this day-partitioned history "
+                                               "database (see cron/odds_history.py)")
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port, args.db, args.odds_history)
+    print(f"Serving ingest API on http://{args.host}:{args.port} using {args.db}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,502 @@
+"""
+Append-only odds history, partitioned by day.
+
+Every poll of a book produces the same lines again, so the history grows by
+millions of rows a day and is almost only read as "line history for player
+X, stat Y, book Z over the last few hours" or "the latest line". Instead of
+one flat odds table, each UTC day gets its own WITHOUT ROWID table clustered
+on
+
+    (player_id, stat_id, book_id, ts, market_id)
+
+so a player/stat/book range is one contiguous run of a B-tree that holds
+every column (the primary key is the covering index), and dropping a day is
+a DROP TABLE rather than a huge DELETE.
+
+Rows are stored as small integers:
+
+    ts         milliseconds since the epoch (naive timestamps are UTC)
+    odds       odds_value * 1000
+    stat_id    id in odds_stats (0 for no stat)
+    market_id  id in odds_markets, one per (bet_type, threshold)
+    player_id  0 for team-level odds
+
+Old days can be compacted, keeping only the first and last sample of each
+run of unchanged odds, and dropped after a retention period:
+
+    python -m cron.odds_history --db cron/odds_history.db --load odds.ndjson
+    python -m cron.odds_history --db cron/odds_history.db --compact-days 2 --retention-days 90
+"""
+import argparse
+import datetime
+import json
+import sqlite3
+import threading
+import time
+from itertools import groupby, islice
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from cron.models import OddsPayload, validate_batch
+from cron.scraper.jsonstream import iter_records
+
+PARTITION_PREFIX = "odds_history_"
+ODDS_SCALE = 1000       # odds_value is stored as round(odds_value * ODDS_SCALE)
+LATEST_LOOKBACK_DAYS = 7  # Days latest() searches back for a book's last line
+LOAD_BATCH_SIZE = 50000   # Records validated and appended at a time by the CLI
+DAY_MS = 86400 * 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS odds_partitions (
+    day TEXT PRIMARY KEY,          -- YYYYMMDD, UTC
+    rows INTEGER NOT NULL DEFAULT 0,
+    compacted_at TEXT
+);
+CREATE TABLE IF NOT EXISTS odds_stats (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+-- Newest sample of every market, updated with each append
+CREATE TABLE IF NOT EXISTS odds_latest (
+    player_id INTEGER NOT NULL,
+    stat_id INTEGER NOT NULL,
+    book_id INTEGER NOT NULL,
+    ts INTEGER NOT NULL,
+    market_id INTEGER NOT NULL,
+    game_id INTEGER NOT NULL,
+    odds INTEGER NOT NULL,
+    details TEXT,
+    PRIMARY KEY (player_id, stat_id, book_id, market_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS odds_latest_book_id ON odds_latest (book_id, stat_id);
+CREATE INDEX IF NOT EXISTS odds_latest_stat_id ON odds_latest (stat_id);
+CREATE TABLE IF NOT EXISTS odds_markets (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,      -- bet_type and threshold, as JSON
+    bet_type TEXT NOT NULL,
+    threshold REAL
+);
+"""
+
+PARTITION_SCHEMA = """
+CREATE TABLE IF NOT EXISTS {table} (
+    player_id INTEGER NOT NULL,
+    stat_id INTEGER NOT NULL,
+    book_id INTEGER NOT NULL,
+    ts INTEGER NOT NULL,
+    market_id INTEGER NOT NULL,
+    game_id INTEGER NOT NULL,
+    odds INTEGER NOT NULL,
+    details TEXT,
+    PRIMARY KEY (player_id, stat_id, book_id, ts, market_id)
+) WITHOUT ROWID
+"""
+
+
+class HistoryRow(NamedTuple):
+    """One stored sample of one line"""
+    timestamp: datetime.datetime  # UTC, naive like OddsPayload's default
+    player_id: Optional[int]
+    stat: Optional[str]
+    book_id: int
+    bet_type: str
+    threshold: Optional[float]
+    odds_value: float
+    game_id: int
+    additional_details: Optional[str]
+
+
+def _to_ms(timestamp: Optional[datetime.datetime]) -> int:
+    if timestamp is None:
+        return int(time.time() * 1000)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=datetime.timezone.utc)
+    return int(timestamp.timestamp() * 1000)
+
+
+def _from_ms(ms: int) -> datetime.datetime:
+    return datetime.datetime.fromtimestamp(ms / 1000, datetime.timezone.utc).replace(tzinfo=None)
+
+
+def _day(ms: int) -> str:
+    return time.strftime("%Y%m%d", time.gmtime(ms // 1000))
+
+
+def _table(day: str) -> str:
+    return PARTITION_PREFIX + day
+
+
+class OddsHistory:
+    """
+    Day-partitioned odds history in SQLite.
+
+    Safe to share between threads. Writes are append-only: a sample with the
+    same line and timestamp as a stored one is ignored.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        # Lets prune() hand the pages of dropped days back to the filesystem;
+        # only takes effect on a new database file
+        self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA cache_size=-65536")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self._reset_caches()
+        if self._conn.execute("SELECT NOT EXISTS (SELECT 1 FROM odds_latest)").fetchone()[0]:
+            self._rebuild_latest()
+
+    def _rebuild_latest(self) -> None:
+        """Fill odds_latest from the stored days, oldest first"""
+        with self._conn:
+            for day in reversed(self._days()):
+                # With MAX(), SQLite takes the other bare columns from the row holding the maximum
+                self._conn.execute(
+                    "INSERT INTO odds_latest (player_id, stat_id, book_id, ts, market_id, game_id, odds, details) "
+                    "SELECT player_id, stat_id, book_id, MAX(ts), market_id, game_id, odds, details "
+                    f"FROM {_table(day)} WHERE 1 GROUP BY player_id, stat_id, book_id, market_id "
+                    "ON CONFLICT(player_id, stat_id, book_id, market_id) DO UPDATE SET "
+                    "ts = excluded.ts, game_id = excluded.game_id, odds = excluded.odds, details = excluded.details "
+                    "WHERE excluded.ts > odds_latest.ts"
+                )
+
+    def _reset_caches(self) -> None:
+        self._stats: Dict[Optional[str], int] = {None: 0}
+        self._stat_names: Dict[int, Optional[str]] = {0: None}
+        self._markets: Dict[Tuple[str, Optional[float]], int] = {}
+        self._market_keys: Dict[int, Tuple[str, Optional[float]]] = {}
+        self._partitions = set()
+        self._load_dictionaries()
+
+    def _load_dictionaries(self) -> None:
+        for stat_id, name in self._conn.execute("SELECT id, name FROM odds_stats"):
+            self._stats[name] = stat_id
+            self._stat_names[stat_id] = name
+        for market_id, bet_type, threshold in self._conn.execute("SELECT id, bet_type, threshold FROM odds_markets"):
+            self._markets[(bet_type, threshold)] = market_id
+            self._market_keys[market_id] = (bet_type, threshold)
+
+    def _stat_id(self, stat: Optional[str], create: bool = True) -> Optional[int]:
+        if stat in self._stats or not create:
+            return self._stats.get(stat)
+        self._conn.execute("INSERT OR IGNORE INTO odds_stats (name) VALUES (?)", (stat,))
+        stat_id = self._conn.execute("SELECT id FROM odds_stats WHERE name = ?", (stat,)).fetchone()[0]
+        self._stats[stat] = stat_id
+        self._stat_names[stat_id] = stat
+        return stat_id
+
+    def _market_id(self, bet_type: str, threshold: Optional[float]) -> int:
+        market = (bet_type, threshold)
+        if market in self._markets:
+            return self._markets[market]
+        key = json.dumps(market)
+        self._conn.execute("INSERT OR IGNORE INTO odds_markets (key, bet_type, threshold) VALUES (?, ?, ?)",
+                           (key, bet_type, threshold))
+        market_id = self._conn.execute("SELECT id FROM odds_markets WHERE key = ?", (key,)).fetchone()[0]
+        self._markets[market] = market_id
+        self._market_keys[market_id] = market
+        return market_id
+
+    def _partition(self, day: str) -> str:
+        table = _table(day)
+        if day not in self._partitions:
+            self._conn.execute(PARTITION_SCHEMA.format(table=table))
+            self._conn.execute("INSERT OR IGNORE INTO odds_partitions (day) VALUES (?)", (day,))
+            self._partitions.add(day)
+        return table
+
+    def _days(self, start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> List[str]:
+        """Stored days overlapping [start_ms, end_ms], newest first"""
+        query = "SELECT day FROM odds_partitions WHERE day >= ? AND day <= ? ORDER BY day DESC"
+        first = _day(start_ms) if start_ms is not None else "0"
+        last = _day(end_ms) if end_ms is not None else "99999999"
+        return [day for (day,) in self._conn.execute(query, (first, last))]
+
+    # ---------------------------
+    # Writes
+    # ---------------------------
+    def append(self, items: Iterable[OddsPayload]) -> int:
+        """
+        Store a batch of odds in one transaction.
+
+        Returns:
+            int: Samples written (repeats of stored samples are skipped)
+        """
+        with self._lock:
+            try:
+                return self._append(items)
+            except Exception:
+                # Ids and partitions created in the rolled back transaction are gone
+                self._reset_caches()
+                raise
+
+    def _append(self, items: Iterable[OddsPayload]) -> int:
+        with self._conn:
+            rows = []
+            for item in items:
+                ts = _to_ms(item.timestamp)
+                rows.append((
+                    ts // DAY_MS,
+                    item.player_id or 0,
+                    self._stat_id(item.stat),
+                    item.book_id,
+                    ts,
+                    self._market_id(item.bet_type, item.threshold),
+                    item.game_id,
+                    round(item.odds_value * ODDS_SCALE),
+                    item.additional_details,
+                ))
+            # Sorted into primary key order, each day's rows are appended to
+            # neighbouring B-tree pages instead of scattered across the table
+            rows.sort(key=lambda row: row[:6])
+            written = 0
+            for day_number, day_rows in groupby(rows, key=lambda row: row[0]):
+                day = _day(day_number * DAY_MS)
+                cursor = self._conn.executemany(
+                    f"INSERT OR IGNORE INTO {self._partition(day)} "
+                    "(player_id, stat_id, book_id, ts, market_id, game_id, odds, details) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (row[1:] for row in day_rows)
+                )
+                self._conn.execute("UPDATE odds_partitions SET rows = rows + ? WHERE day = ?",
+                                   (cursor.rowcount, day))
+                written += cursor.rowcount
+
+            # Like the partitions, the first sample written for a timestamp wins
+            newest: Dict[Tuple[int, int, int, int], Tuple] = {}
+            for row in rows:
+                key = (row[1], row[2], row[3], row[5])
+                if key not in newest or row[4] > newest[key][4]:
+                    newest[key] = row
+            self._conn.executemany(
+                "INSERT INTO odds_latest (player_id, stat_id, book_id, ts, market_id, game_id, odds, details) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(player_id, stat_id, book_id, market_id) DO UPDATE SET "
+                "ts = excluded.ts, game_id = excluded.game_id, odds = excluded.odds, details = excluded.details "
+                "WHERE excluded.ts > odds_latest.ts",
+                (row[1:] for row in newest.values())
+            )
+        return written
+
+    # ---------------------------
+    # Reads
+    # ---------------------------
+    def _decode(self, rows: Iterable[Tuple]) -> List[HistoryRow]:
+        decoded = []
+        for player_id, stat_id, book_id, ts, market_id, game_id, odds, details in rows:
+            bet_type, threshold = self._market_keys[market_id]
+            decoded.append(HistoryRow(_from_ms(ts), player_id or None, self._stat_names[stat_id], book_id,
+                                      bet_type, threshold, odds / ODDS_SCALE, game_id, details))
+        return decoded
+
+    def _refresh_dictionaries(self, stat: Optional[str]) -> Optional[int]:
+        # Another process may have added stats or markets since they were loaded
+        stat_id = self._stat_id(stat, create=False)
+        if stat_id is None:
+            self._load_dictionaries()
+            stat_id = self._stat_id(stat, create=False)
+        return stat_id
+
+    def history(self, player_id: Optional[int], stat: Optional[str], book_id: Optional[int] = None,
+                start: Optional[datetime.datetime] = None,
+                end: Optional[datetime.datetime] = None) -> List[HistoryRow]:
+        """
+        Every stored sample of a player's stat line between `start` and `end`
+        (inclusive, default: all), oldest first.
+
+        Args:
+            player_id (Optional[int]): Player, or None for team-level odds
+            stat (Optional[str]): Stat name as stored in OddsPayload.stat
+            book_id (Optional[int]): Only this book (default: every book)
+            start (Optional[datetime.datetime]): Earliest timestamp
+            end (Optional[datetime.datetime]): Latest timestamp
+        """
+        start_ms = _to_ms(start) if start is not None else None
+        end_ms = _to_ms(end) if end is not None else None
+        with self._lock:
+            stat_id = self._refresh_dictionaries(stat)
+            if stat_id is None:
+                return []
+            where = "player_id = ? AND stat_id = ?"
+            params: List[Any] = [player_id or 0, stat_id]
+            if book_id is not None:
+                where += " AND book_id = ?"
+                params.append(book_id)
+            if start_ms is not None:
+                where += " AND ts >= ?"
+                params.append(start_ms)
+            if end_ms is not None:
+                where += " AND ts <= ?"
+                params.append(end_ms)
+            rows = []
+            for day in reversed(self._days(start_ms, end_ms)):
+                rows.extend(self._conn.execute(
+                    f"SELECT * FROM {_table(day)} WHERE {where} ORDER BY ts, book_id, market_id", params
+                ))
+            self._load_missing_markets(rows)
+            return self._decode(rows)
+
+    def latest(self, player_id: Optional[int], stat: Optional[str], book_id: Optional[int] = None,
+               lookback_days: int = LATEST_LOOKBACK_DAYS) -> List[HistoryRow]:
+        """
+        The newest sample of every market (bet type and threshold) of a
+        player's stat line, per book, sampled in the last `lookback_days` days.
+        Each line of a ladder keeps its own newest sample, like
+        storage.latest_odds().
+        """
+        with self._lock:
+            stat_id = self._refresh_dictionaries(stat)
+            if stat_id is None:
+                return []
+            where = "player_id = ? AND stat_id = ?"
+            params: List[Any] = [player_id or 0, stat_id]
+            if book_id is not None:
+                where += " AND book_id = ?"
+                params.append(book_id)
+            return self._latest_rows(where, params, lookback_days)
+
+    def board(self, book_id: Optional[int] = None, stat: Optional[str] = None,
+              lookback_days: int = LATEST_LOOKBACK_DAYS) -> List[HistoryRow]:
+        """
+        The current board: latest() for every player and stat line, optionally
+        only one book's and/or one stat's. Reads odds_latest through its
+        indexes, so the cost follows the size of the result.
+        """
+        with self._lock:
+            where, params = [], []
+            if stat is not None:
+                stat_id = self._refresh_dictionaries(stat)
+                if stat_id is None:
+                    return []
+                where.append("stat_id = ?")
+                params.append(stat_id)
+            if book_id is not None:
+                where.append("book_id = ?")
+                params.append(book_id)
+            return self._latest_rows(" AND ".join(where) or "1", params, lookback_days)
+
+    def _latest_rows(self, where: str, params: List[Any], lookback_days: int) -> List[HistoryRow]:
+        """Rows of odds_latest matching `where` sampled within the last `lookback_days` days"""
+        since = (int(time.time() * 1000) - lookback_days * DAY_MS) // DAY_MS * DAY_MS
+        rows = self._conn.execute(
+            "SELECT player_id, stat_id, book_id, ts, market_id, game_id, odds, details FROM odds_latest "
+            f"WHERE {where} AND ts >= ? ORDER BY player_id, stat_id, book_id, market_id", params + [since]
+        ).fetchall()
+        self._load_missing_markets(rows)
+        return self._decode(rows)
+
+    def _load_missing_markets(self, rows: List[Tuple]) -> None:
+        if any(row[4] not in self._market_keys for row in rows):
+            self._load_dictionaries()
+
+    # ---------------------------
+    # Maintenance
+    # ---------------------------
+    def compact(self, older_than_days: int = 2) -> int:
+        """
+        Thin out days that ended more than `older_than_days` ago and have not
+        been compacted yet: of each run of samples with unchanged odds, only
+        the first and the last are kept.
+
+        Returns:
+            int: Samples removed
+        """
+        cutoff = _day(int((time.time() - older_than_days * 86400) * 1000))
+        removed = 0
+        with self._lock:
+            days = [day for (day,) in self._conn.execute(
+                "SELECT day FROM odds_partitions WHERE day < ? AND compacted_at IS NULL", (cutoff,)
+            )]
+            for day in days:
+                table = _table(day)
+                with self._conn:
+                    cursor = self._conn.execute(
+                        f"DELETE FROM {table} WHERE (player_id, stat_id, book_id, ts, market_id) IN ("
+                        "SELECT player_id, stat_id, book_id, ts, market_id FROM ("
+                        "SELECT player_id, stat_id, book_id, ts, market_id, odds, "
+                        "LAG(odds) OVER line AS previous, LEAD(odds) OVER line AS next "
+                        f"FROM {table} "
+                        "WINDOW line AS (PARTITION BY player_id, stat_id, book_id, market_id ORDER BY ts)"
+                        ") WHERE odds = previous AND odds = next)"
+                    )
+                    self._conn.execute(
+                        "UPDATE odds_partitions SET rows = rows - ?, compacted_at = ? WHERE day = ?",
+                        (cursor.rowcount, datetime.datetime.utcnow().isoformat(), day)
+                    )
+                removed += cursor.rowcount
+        return removed
+
+    def prune(self, retention_days: int) -> List[str]:
+        """
+        Drop days that ended more than `retention_days` ago.
+
+        Returns:
+            List[str]: The dropped days (YYYYMMDD)
+        """
+        cutoff_ms = int((time.time() - retention_days * 86400) * 1000)
+        with self._lock:
+            days = [day for (day,) in self._conn.execute(
+                "SELECT day FROM odds_partitions WHERE day < ? ORDER BY day", (_day(cutoff_ms),)
+            )]
+            with self._conn:
+                for day in days:
+                    self._conn.execute(f"DROP TABLE IF EXISTS {_table(day)}")
+                    self._conn.execute("DELETE FROM odds_partitions WHERE day = ?", (day,))
+                    self._partitions.discard(day)
+                self._conn.execute("DELETE FROM odds_latest WHERE ts < ?", (cutoff_ms // DAY_MS * DAY_MS,))
+            # execute() would stop after the pragma's first step, freeing one page
+            self._conn.executescript("PRAGMA incremental_vacuum;")
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return days
+
+    def partitions(self) -> List[Dict[str, Any]]:
+        """Stored days with their row counts, oldest first"""
+        with self._lock:
+            rows = self._conn.execute("SELECT day, rows, compacted_at FROM odds_partitions ORDER BY day").fetchall()
+        return [dict(zip(("day", "rows", "compacted_at"), row)) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def payloads(rows: Iterable[HistoryRow]) -> List[OddsPayload]:
+    """History rows as OddsPayload models"""
+    return validate_batch(OddsPayload, (row._asdict() for row in rows))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load, compact and prune the odds history.")
+    parser.add_argument("--db", required=True, help="History database path")
+    parser.add_argument("--load", nargs="*", default=[], help="Files of OddsPayload records to append")
+    parser.add_argument("--compact-days", type=int, help="Compact days older than this many days")
+    parser.add_argument("--retention-days", type=int, help="Drop days older than this many days")
+    args = parser.parse_args()
+
+    history = OddsHistory(args.db)
+    for path in args.load:
+        start = time.perf_counter()
+        records = iter_records(path)
+        written = 0
+        while True:
+            batch = list(islice(records, LOAD_BATCH_SIZE))
+            if not batch:
+                break
+            written += history.append(validate_batch(OddsPayload, batch))
+        elapsed = time.perf_counter() - start
+        print(f"Appended {written} samples from {path} in {elapsed:.2f}s")
+    if args.compact_days is not None:
+        print(f"Compacted away {history.compact(args.compact_days)} unchanged samples")
+    if args.retention_days is not None:
+        print(f"Dropped days: {', '.join(history.prune(args.retention_days)) or 'none'}")
+    for partition in history.partitions():
+        print(f"{partition['day']}: {partition['rows']} rows"
+              f"{', compacted' if partition['compacted_at'] else ''}")
+    history.close()
+
+
+if __name__ == "__main__":
+    main()
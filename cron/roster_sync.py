@@ -0,0 +1,179 @@
+"""
+Incremental sync of balldontlie teams and players into SQLite.
+
+players_ingestion.py --sync-db stores every team and player as a row with a
+hash of its content, instead of rewriting the JSON dumps. A refresh compares
+the downloaded records against the stored hashes and only inserts or updates
+the rows whose content changed, all in one transaction, then records the run
+in `sync_state`:
+
+    source     "bdl_teams" or "bdl_players"
+    synced_at  when the last sync finished (the watermark)
+    changed_at when the last sync that changed anything finished
+    rows       records seen by the last sync
+    changed    rows it inserted or updated
+
+Every changed row gets `updated_at` set to the sync's timestamp, so
+changed_since(table, watermark) lists what the refreshes after a watermark
+touched. Rows missing from a download are kept, since a team whose request
+failed would otherwise lose its roster.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bdl_teams (
+    id INTEGER PRIMARY KEY,
+    full_name TEXT,
+    abbreviation TEXT,
+    data TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bdl_players (
+    id INTEGER PRIMARY KEY,
+    team_id INTEGER,
+    first_name TEXT,
+    last_name TEXT,
+    position TEXT,
+    data TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bdl_players_team_id ON bdl_players (team_id);
+CREATE TABLE IF NOT EXISTS sync_state (
+    source TEXT PRIMARY KEY,
+    synced_at TEXT NOT NULL,
+    changed_at TEXT,
+    rows INTEGER NOT NULL,
+    changed INTEGER NOT NULL
+);
+"""
+
+
+def _team_columns(team: Dict[str, Any]) -> Tuple[Any, ...]:
+    return team.get("full_name"), team.get("abbreviation")
+
+
+def _player_columns(player: Dict[str, Any]) -> Tuple[Any, ...]:
+    # The API nests the team; the table keeps its id
+    team_id = (player.get("team") or {}).get("id")
+    return team_id, player.get("first_name"), player.get("last_name"), player.get("position")
+
+
+# Columns copied out of each record next to its full JSON, and how, per table
+TABLES: Dict[str, Tuple[Tuple[str, ...], Callable[[Dict[str, Any]], Tuple[Any, ...]]]] = {
+    "bdl_teams": (("full_name", "abbreviation"), _team_columns),
+    "bdl_players": (("team_id", "first_name", "last_name", "position"), _player_columns),
+}
+
+
+class SyncResult(NamedTuple):
+    """Outcome of syncing one table"""
+    rows: int         # Records in the download
+    inserted: int     # New ids
+    updated: int      # Existing ids whose content changed
+
+    @property
+    def changed(self) -> int:
+        return self.inserted + self.updated
+
+
+def content_hash(record: Dict[str, Any]) -> Tuple[str, str]:
+    """Canonical JSON of a record and its hash; key order does not affect either"""
+    data = json.dumps(record, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return data, hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+
+
+class RosterStore:
+    """Team and player rows in SQLite, updated only where their content changed"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def last_sync(self, source: str = "bdl_players") -> Optional[Dict[str, Any]]:
+        """The watermark row recorded for `source`, or None before its first sync"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT synced_at, changed_at, rows, changed FROM sync_state WHERE source = ?", (source,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("synced_at", "changed_at", "rows", "changed"), row))
+
+    def sync(self, teams: Iterable[Dict[str, Any]], players: Iterable[Dict[str, Any]]) -> Dict[str, SyncResult]:
+        """
+        Upsert the teams and players whose content changed and advance the
+        watermarks, in a single transaction.
+
+        Args:
+            teams (Iterable[Dict[str, Any]]): Team records from the API
+            players (Iterable[Dict[str, Any]]): Player records from the API
+
+        Returns:
+            Dict[str, SyncResult]: Result per table
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        with self._lock, self._conn:
+            results = {
+                "bdl_teams": self._sync_table("bdl_teams", teams, now),
+                "bdl_players": self._sync_table("bdl_players", players, now),
+            }
+            self._conn.executemany(
+                "INSERT INTO sync_state (source, synced_at, changed_at, rows, changed) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(source) DO UPDATE SET synced_at = excluded.synced_at, "
+                "changed_at = COALESCE(excluded.changed_at, sync_state.changed_at), "
+                "rows = excluded.rows, changed = excluded.changed",
+                [(source, now, now if result.changed else None, result.rows, result.changed)
+                 for source, result in results.items()]
+            )
+        return results
+
+    def _sync_table(self, table: str, records: Iterable[Dict[str, Any]], now: str) -> SyncResult:
+        columns, extract = TABLES[table]
+        stored = dict(self._conn.execute(f"SELECT id, hash FROM {table}"))
+        changed: List[Sequence[Any]] = []
+        rows = inserted = 0
+        # Records are keyed by id; a repeated id keeps its last version
+        for record in {record["id"]: record for record in records if record.get("id") is not None}.values():
+            rows += 1
+            data, digest = content_hash(record)
+            previous = stored.get(record["id"])
+            if previous == digest:
+                continue
+            if previous is None:
+                inserted += 1
+            changed.append((record["id"], *extract(record), data, digest, now))
+
+        assignments = ", ".join(f"{column} = excluded.{column}" for column in columns + ("data", "hash", "updated_at"))
+        self._conn.executemany(
+            f"INSERT INTO {table} (id, {', '.join(columns)}, data, hash, updated_at) "
+            f"VALUES ({', '.join('?' * (len(columns) + 4))}) "
+            f"ON CONFLICT(id) DO UPDATE SET {assignments}",
+            changed
+        )
+        return SyncResult(rows, inserted, len(changed) - inserted)
+
+    def changed_since(self, table: str, since: str) -> List[Dict[str, Any]]:
+        """Records of `table` inserted or updated after the ISO timestamp `since`"""
+        if table not in TABLES:
+            raise ValueError(f"Unknown table {table}")
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT data FROM {table} WHERE updated_at > ? ORDER BY id", (since,)
+            ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
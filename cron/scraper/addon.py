@@ -0,0 +1,71 @@
+"""
+mitmproxy addon that parses sportsbook responses as they are captured.
+
+Run it alongside (or instead of) recording to a file:
+
+    mitmdump -p 8080 -s addon.py
+    mitmproxy -p 8080 -w traffic.mitm -s addon.py
+
+Pass `--set odds_delta=true` to send only changed lines.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from mitmproxy import ctx, http
+
+from delivery import close_senders
+from delta import SnapshotStore
+from parsers.base import BaseParser, parser_factory
+from parsers.traffic import TrafficView
+from parsers.bet365 import Bet365Parser  # This will register the parser
+
+logger = logging.getLogger(__name__)
+
+
+class LiveOddsAddon:
+    """Parse matching responses off the proxy's event loop and queue them for delivery"""
+
+    def __init__(self):
+        # A single worker keeps results in capture order
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="live-odds")
+        self._snapshots = SnapshotStore()
+
+    def load(self, loader) -> None:
+        loader.add_option(
+            "odds_delta", bool, False,
+            "Send only added, changed and removed lines instead of full market snapshots.",
+        )
+
+    def response(self, flow: http.HTTPFlow) -> None:
+        if flow.response is None:
+            return
+        try:
+            parser = parser_factory.get_parser_for_url(flow.request.url)
+        except ValueError:
+            return
+
+        # Decoding, parsing and sending all happen in the background
+        # so the proxied response is never held up.
+        traffic_data = TrafficView(flow)
+        self._executor.submit(self._process, parser, traffic_data, ctx.options.odds_delta)
+
+    def _process(self, parser: BaseParser, traffic_data: TrafficView, delta: bool = False) -> None:
+        url = traffic_data.url
+        try:
+            processed_data = parser.process_traffic(traffic_data)
+            if delta:
+                processed_data = self._snapshots.diff(processed_data)
+                if processed_data is None:
+                    return
+            # Never block the pipeline on a backed-up endpoint; the sender logs drops
+            if parser.send_to_endpoint(processed_data, block=False):
+                logger.info(f"Queued live data for {processed_data['stat_type']} from URL: {url}")
+        except Exception as e:
+            logger.error(f"Error processing live flow for {url}: {str(e)}")
+
+    def done(self) -> None:
+        self._executor.shutdown(wait=True)
+        close_senders()
+
+
+addons = [LiveOddsAddon()]
@@ -0,0 +1,3 @@
+"""
+Scraper benchmarks: synthetic Bet365 workloads and throughput measurements
+"""
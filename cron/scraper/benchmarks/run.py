@@ -0,0 +1,277 @@
+"""
+Measure scraper throughput on synthetic workloads.
+
+Run from cron/scraper:
+
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --baseline bench.json --max-regression 0.2
+
+Delivery is pointed at a local sink server, so the numbers include queueing
+and batching but not a real network.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional
+
+from benchmarks.workload import (
+    OVER_UNDER_STATS,
+    STANDARD_STATS,
+    make_bet365_payload,
+    make_odds_rows,
+    make_player_rows,
+    write_mitm_directory,
+    write_mitm_file,
+)
+
+# Metrics compared against a baseline; all are higher-is-better
+THROUGHPUT_METRICS = ('flows_per_sec', 'mb_per_sec', 'rows_per_sec')
+
+
+class _SinkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_sink() -> str:
+    """Start a local HTTP server that accepts and discards odds POSTs; returns its URL"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _SinkHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}/api/odds"
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KB on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return round(peak / scale, 1)
+
+
+def _isolated(fn: Callable[..., Dict[str, Any]], *args) -> Dict[str, Any]:
+    """Run a benchmark in a fresh child process so peak RSS is its own"""
+    ctx = multiprocessing.get_context('fork')
+    results = ctx.Queue()
+
+    def target():
+        try:
+            result = fn(*args)
+            result['peak_rss_mb'] = _peak_rss_mb()
+            results.put(result)
+        except Exception as e:
+            results.put({'error': str(e)})
+
+    process = ctx.Process(target=target)
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def bench_parse(stat: str, matches: int, players: int, columns: int, repeat: int) -> Dict[str, Any]:
+    """Time Bet365Parser._parse_bet365_data on one in-memory payload"""
+    from parsers.bet365 import Bet365Parser
+
+    parser = Bet365Parser()
+    payload = make_bet365_payload(stat, matches, players, columns, seed=0)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        parser._parse_bet365_data(payload)
+    elapsed = time.perf_counter() - start
+    return {
+        'flows': repeat,
+        'bytes': len(payload.encode()) * repeat,
+        'seconds': round(elapsed, 4),
+        'flows_per_sec': round(repeat / elapsed, 1),
+        'mb_per_sec': round(len(payload.encode()) * repeat / elapsed / 1e6, 2),
+    }
+
+
+def bench_file(path: str, flows: int) -> Dict[str, Any]:
+    """Time process_traffic_file over one capture, including delivery"""
+    import main
+    from delivery import flush_senders
+
+    size = os.path.getsize(path)
+    start = time.perf_counter()
+    main.process_traffic_file(path)
+    flush_senders()
+    elapsed = time.perf_counter() - start
+    return {
+        'flows': flows,
+        'bytes': size,
+        'seconds': round(elapsed, 4),
+        'flows_per_sec': round(flows / elapsed, 1),
+        'mb_per_sec': round(size / elapsed / 1e6, 2),
+    }
+
+
+def bench_directory(directory: str, flows: int, workers: int) -> Dict[str, Any]:
+    """Time process_directory over a directory of captures, including delivery"""
+    import main
+    from delivery import flush_senders
+
+    size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+    start = time.perf_counter()
+    main.process_directory(directory, workers=workers)
+    flush_senders()
+    elapsed = time.perf_counter() - start
+    return {
+        'flows': flows,
+        'bytes': size,
+        'workers': workers,
+        'seconds': round(elapsed, 4),
+        'flows_per_sec': round(flows / elapsed, 1),
+        'mb_per_sec': round(size / elapsed / 1e6, 2),
+    }
+
+
+def bench_models(kind: str, rows: int) -> Dict[str, Dict[str, Any]]:
+    """Time the per-object pydantic path against the bulk helpers in models.py"""
+    import models
+
+    model, items = {
+        'players': (models.PlayerPayload, make_player_rows(rows, seed=0)),
+        'odds': (models.OddsPayload, make_odds_rows(rows, seed=0)),
+    }[kind]
+    validated = models.validate_batch(model, items)
+    dump = getattr(model, 'model_dump', None) and (lambda item: item.model_dump()) or (lambda item: item.dict())
+
+    cases = {
+        'validate/per_object': lambda: [model(**item) for item in items],
+        'validate/batch': lambda: models.validate_batch(model, items),
+        'dump_json/per_object': lambda: json.dumps([dump(item) for item in validated], default=str),
+        'dump_json/batch': lambda: models.dump_batch_json(validated),
+    }
+    results = {}
+    for case, fn in cases.items():
+        fn()  # Warm up validator and serialiser caches
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        results[f"models[{kind}:{case}]"] = {
+            'rows': rows,
+            'seconds': round(elapsed, 4),
+            'rows_per_sec': round(rows / elapsed, 1),
+        }
+    return results
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    results: Dict[str, Dict[str, Any]] = {}
+    for stat in (STANDARD_STATS[0], OVER_UNDER_STATS[0]):
+        name = f"parse[{stat}]"
+        print(f"Running {name}...")
+        results[name] = _isolated(bench_parse, stat, args.matches, args.players, args.columns, args.repeat)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "traffic.mitm")
+        flows = write_mitm_file(path, flows=args.flows, matches=args.matches,
+                                players=args.players, columns=args.columns)
+        print("Running process_traffic_file...")
+        results["process_traffic_file"] = _isolated(bench_file, path, flows)
+
+        directory = os.path.join(tmp, "scrape-data")
+        flows = write_mitm_directory(directory, files=args.files, flows=args.flows, matches=args.matches,
+                                     players=args.players, columns=args.columns)
+        for workers in sorted({1, args.workers}):
+            name = f"process_directory[workers={workers}]"
+            print(f"Running {name}...")
+            results[name] = _isolated(bench_directory, directory, flows, workers)
+
+    for kind in ('players', 'odds'):
+        print(f"Running models[{kind}]...")
+        results.update(bench_models(kind, args.rows))
+
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'params': {k: v for k, v in vars(args).items() if k not in ('output', 'baseline', 'max_regression')},
+        },
+        'results': results,
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], max_regression: Optional[float]) -> bool:
+    """
+    Print each throughput metric against the baseline.
+
+    Returns:
+        bool: False if any metric regressed by more than max_regression (a fraction)
+    """
+    ok = True
+    for name, result in report['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if not base:
+            continue
+        for metric in THROUGHPUT_METRICS:
+            if metric not in result or not base.get(metric):
+                continue
+            ratio = result[metric] / base[metric]
+            flag = ''
+            if max_regression is not None and ratio < 1 - max_regression:
+                flag = '  REGRESSION'
+                ok = False
+            print(f"{name:40} {metric:14} {base[metric]:>12} -> {result[metric]:>12} ({ratio:.2f}x){flag}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scraper on synthetic Bet365 workloads.")
+    parser.add_argument("--matches", type=int, default=10, help="Matches per payload (default: 10)")
+    parser.add_argument("--players", type=int, default=12, help="Players per match (default: 12)")
+    parser.add_argument("--columns", type=int, default=5, help="Threshold columns per match (default: 5)")
+    parser.add_argument("--repeat", type=int, default=200, help="Parses per parse benchmark (default: 200)")
+    parser.add_argument("--flows", type=int, default=200, help="Markets flows per capture file (default: 200)")
+    parser.add_argument("--files", type=int, default=4, help="Capture files for process_directory (default: 4)")
+    parser.add_argument("--rows", type=int, default=20000, help="Rows per model benchmark (default: 20000)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Workers for the parallel process_directory run (default: CPU count)")
+    parser.add_argument("--output", "-o", help="Write the JSON report to this path")
+    parser.add_argument("--baseline", "-b", help="Compare against a previous JSON report")
+    parser.add_argument("--max-regression", type=float,
+                        help="Exit non-zero if a throughput metric drops by more than this fraction")
+    args = parser.parse_args()
+
+    # Deliver to a local sink instead of the production endpoint; must be set
+    # before the scraper modules read their config.
+    os.environ["PRODUCTION_SERVER_ENDPOINT"] = start_sink()
+
+    report = run(args)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+        print(f"Wrote {args.output}")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if not compare(report, baseline, args.max_regression):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import json
+import os
+import random
+from typing import Any, Dict, List, Optional
+
+from mitmproxy import http, io
+from mitmproxy.test import tflow
+
+BET365_MARKETS_URL = "https://www.bet365.com.au/matchmarketscontentapi/markets"
+NOISE_URL = "https://www.bet365.com.au/static/noise.js"
+
+STANDARD_STATS = ['Points', 'Assists', 'Rebounds', 'Threes Made']
+OVER_UNDER_STATS = ['Points O/U', 'Assists O/U', 'Rebounds O/U']
+
+
+def _fraction(rng: random.Random) -> str:
+    return f"{rng.randint(1, 40)}/{rng.choice([1, 2, 4, 5, 10, 20])}"
+
+
+def make_bet365_payload(stat: str = 'Points', matches: int = 10, players: int = 12,
+                        columns: int = 5, seed: Optional[int] = None) -> str:
+    """
+    Build a synthetic Bet365 markets payload in the `|`/`;`/`=` wire format.
+
+    Standard stats produce `CO;` columns of over-only odds; anything else
+    produces `MA;` Over/Under markets with `HA=` thresholds.
+
+    Args:
+        stat (str): Stat label carried on the LS=1 header record
+        matches (int): Number of `MG;` match groups
+        players (int): Players per match
+        columns (int): Threshold columns per match (standard stats only)
+        seed (Optional[int]): Seed for reproducible odds
+
+    Returns:
+        str: The payload
+    """
+    rng = random.Random(seed)
+    records = ['F;CL=18;ID=B18', f'MA;NA={stat};LS=1', 'MA;NA=More;LS=1']
+    for m in range(matches):
+        records.append(f'MG;ID=G{m};NA=Team {m}A @ Team {m}B')
+        records.append(f'MA;ID=M{m};NA=Players')
+        for p in range(players):
+            records.append(f'PA;ID=PC{m * 1000 + p};NA=Player {m}-{p};FI={m}')
+        if stat in STANDARD_STATS:
+            for c in range(columns):
+                records.append(f'CO;ID=C{c};NA={5 * (c + 1)}+')
+                for p in range(players):
+                    records.append(f'PA;ID=P{m}{c}{p};OD={_fraction(rng)};SU=0')
+        else:
+            for side in ('Over', 'Under'):
+                records.append(f'MA;ID=M{m}{side};NA={side}')
+                for p in range(players):
+                    records.append(f'PA;ID=P{m}{p};OD={_fraction(rng)};HA={rng.randint(5, 30)}.5')
+    return '|'.join(records)
+
+
+def make_flow(url: str, content: bytes, timestamp: float) -> http.HTTPFlow:
+    flow = tflow.tflow(resp=True)
+    flow.request.url = url
+    flow.request.timestamp_start = timestamp
+    flow.response.content = content
+    flow.response.headers["content-type"] = "text/plain; charset=utf-8"
+    return flow
+
+
+def write_mitm_file(path: str, flows: int = 100, noise_ratio: float = 0.5, matches: int = 10,
+                    players: int = 12, columns: int = 5, distinct_payloads: int = 8,
+                    seed: int = 0) -> int:
+    """
+    Write a synthetic capture file of Bet365 markets responses mixed with noise.
+
+    Payloads cycle through `distinct_payloads` variants across the stat types,
+    so captures contain the repeated responses real polling produces.
+
+    Args:
+        path (str): Output .mitm path
+        flows (int): Number of Bet365 markets flows
+        noise_ratio (float): Extra non-matching flows per markets flow
+        matches, players, columns: Size of each payload (see make_bet365_payload)
+        distinct_payloads (int): Number of distinct payloads to cycle through
+        seed (int): Seed for reproducible output
+
+    Returns:
+        int: Total number of flows written
+    """
+    rng = random.Random(seed)
+    stats = STANDARD_STATS + OVER_UNDER_STATS
+    payloads: List[bytes] = [
+        make_bet365_payload(stats[n % len(stats)], matches, players, columns, seed=seed + n).encode()
+        for n in range(max(1, distinct_payloads))
+    ]
+    noise = b"x" * 2048
+    written = 0
+    timestamp = 1700000000.0
+    with open(path, "wb") as f:
+        writer = io.FlowWriter(f)
+        for n in range(flows):
+            writer.add(make_flow(f"{BET365_MARKETS_URL}?pd=market{n % len(payloads)}",
+                                 payloads[n % len(payloads)], timestamp))
+            written += 1
+            timestamp += 1
+            while rng.random() < noise_ratio / (1 + noise_ratio):
+                writer.add(make_flow(NOISE_URL, noise, timestamp))
+                written += 1
+    return written
+
+
+def write_mitm_directory(directory: str, files: int = 4, **kwargs) -> int:
+    """Write `files` synthetic captures into a directory; returns the total flow count"""
+    os.makedirs(directory, exist_ok=True)
+    seed = kwargs.pop("seed", 0)
+    return sum(
+        write_mitm_file(os.path.join(directory, f"traffic{n}.mitm"), seed=seed + n * 100, **kwargs)
+        for n in range(files)
+    )
+
+
+def make_player_rows(rows: int = 1000, seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """PlayerPayload dicts shaped like the ones players.py builds"""
+    rng = random.Random(seed)
+    return [
+        {
+            'name': f"Player {n}",
+            'team_id': rng.randint(1, 45),
+            'position': rng.choice(['G', 'F', 'C', 'G-F', None]),
+            'details': json.dumps({'player_id': n, 'team_abbreviation': 'LAL', 'city': 'Los Angeles'}),
+        }
+        for n in range(rows)
+    ]
+
+
+def make_odds_rows(rows: int = 1000, seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """OddsPayload dicts for one scraped market per 50 rows"""
+    rng = random.Random(seed)
+    return [
+        {
+            'game_id': n // 50,
+            'player_id': rng.randint(1, 600),
+            'book_id': 1,
+            'bet_type': 'O/U',
+            'stat': rng.choice(STANDARD_STATS),
+            'threshold': rng.randint(5, 30) + 0.5,
+            'odds_value': round(rng.uniform(1.1, 5.0), 3),
+            'timestamp': '2025-01-01T19:30:00',
+        }
+        for n in range(rows)
+    ]
@@ -0,0 +1,55 @@
+import json
+import os
+from dataclasses import dataclass, asdict
+from typing import Optional
+
+CHECKPOINT_SUFFIX = ".ckpt"
+
+
+@dataclass
+class Checkpoint:
+    """Position reached in a capture file"""
+    offset: int = 0   # Byte offset just past the last fully read flow
+    flows: int = 0    # Number of flows read up to offset
+    inode: Optional[int] = None  # Detects the capture being replaced under the same name
+
+
+def checkpoint_path(file_path: str) -> str:
+    """Path of the sidecar checkpoint kept next to a capture file"""
+    return file_path + CHECKPOINT_SUFFIX
+
+
+def load_checkpoint(file_path: str) -> Checkpoint:
+    """
+    Load the checkpoint for a capture file.
+
+    A fresh checkpoint is returned when none exists, or when the stored one no
+    longer matches the file (it was replaced or truncated), so processing
+    restarts from the beginning.
+
+    Args:
+        file_path (str): Path to the traffic.mitm file
+
+    Returns:
+        Checkpoint: Where processing should resume
+    """
+    try:
+        with open(checkpoint_path(file_path)) as f:
+            checkpoint = Checkpoint(**json.load(f))
+    except (FileNotFoundError, ValueError, TypeError):
+        return Checkpoint()
+
+    stat = os.stat(file_path)
+    if (checkpoint.inode is not None and checkpoint.inode != stat.st_ino) or checkpoint.offset > stat.st_size:
+        return Checkpoint()
+    return checkpoint
+
+
+def save_checkpoint(file_path: str, checkpoint: Checkpoint) -> None:
+    """Atomically persist the checkpoint for a capture file"""
+    checkpoint.inode = os.stat(file_path).st_ino
+    path = checkpoint_path(file_path)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(asdict(checkpoint), f)
+    os.replace(tmp_path, path)
@@ -0,0 +1,24 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ---------------------------
+# Production endpoint
+# ---------------------------
+PRODUCTION_SERVER_IP = os.getenv("PRODUCTION_SERVER_IP")
+PRODUCTION_SERVER_PORT = "8000"
+PRODUCTION_SERVER_ENDPOINT = os.getenv(
+    "PRODUCTION_SERVER_ENDPOINT",
+    f"http://{PRODUCTION_SERVER_IP}:{PRODUCTION_SERVER_PORT}/api/odds"
+)
+
+# ---------------------------
+# Delivery tuning
+# ---------------------------
+DELIVERY_BATCH_SIZE = int(os.getenv("DELIVERY_BATCH_SIZE", "50"))            # Max payloads per bulk POST.
+DELIVERY_FLUSH_INTERVAL = float(os.getenv("DELIVERY_FLUSH_INTERVAL", "0.5"))  # Max seconds a payload waits for a batch.
+DELIVERY_QUEUE_SIZE = int(os.getenv("DELIVERY_QUEUE_SIZE", "10000"))          # Queued payloads before producers block.
+DELIVERY_THREADS = int(os.getenv("DELIVERY_THREADS", "2"))                    # Background sender threads.
+DELIVERY_TIMEOUT = float(os.getenv("DELIVERY_TIMEOUT", "10"))                 # Per-request timeout in seconds.
+DELIVERY_OUTBOX = os.getenv("DELIVERY_OUTBOX")                                # SQLite outbox path; unset sends directly.
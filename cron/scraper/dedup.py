@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Optional
+
+DEFAULT_MAX_ENTRIES = 10000  # URLs remembered before the least recently seen is evicted
+
+
+class ResponseCache:
+    """
+    Bounded LRU of the last response-body hash seen for each URL.
+
+    Lets the scraper skip responses that are byte-for-byte identical to the
+    previous response for the same URL before parsing them. Only the latest
+    hash per URL is kept: a body that changes and then changes back is a real
+    line move and must not be skipped.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._changes: "Optional[OrderedDict[str, str]]" = None
+
+    @staticmethod
+    def digest(content: bytes) -> str:
+        return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+    def seen(self, url: str, content: bytes) -> bool:
+        """
+        Record a response and report whether it is unchanged.
+
+        Args:
+            url (str): Request URL
+            content (bytes): Response body
+
+        Returns:
+            bool: True if the body matches the last one recorded for this URL
+        """
+        digest = self.digest(content)
+        hit = self._entries.get(url) == digest
+        if hit:
+            self._entries.move_to_end(url)
+            self.hits += 1
+        else:
+            self._store(url, digest)
+            self.misses += 1
+        if self._changes is not None:
+            # Hits are kept too, so merging them refreshes the URL's recency
+            self._changes[url] = digest
+            self._changes.move_to_end(url)
+        return hit
+
+    def track_changes(self) -> None:
+        """
+        Start recording the URLs seen from now on, and count hits and misses
+        from zero, so changes() holds only this copy's own work.
+        """
+        self._changes = OrderedDict()
+        self.hits = self.misses = 0
+
+    def changes(self) -> "ResponseCache":
+        """A cache holding only the entries seen and counts since track_changes(), for merge()"""
+        changes = ResponseCache(max_entries=self.max_entries)
+        for url, digest in (self._changes or {}).items():
+            changes._store(url, digest)
+        changes.hits, changes.misses = self.hits, self.misses
+        return changes
+
+    def merge(self, other: "ResponseCache") -> None:
+        """
+        Fold in entries recorded by another cache. For a worker process's copy,
+        pass its changes() so entries it only inherited cannot overwrite newer
+        ones merged from other workers.
+        """
+        for url, digest in other._entries.items():
+            self._store(url, digest)
+        self.hits += other.hits
+        self.misses += other.misses
+
+    def _store(self, url: str, digest: str) -> None:
+        self._entries[url] = digest
+        self._entries.move_to_end(url)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @classmethod
+    def load(cls, path: str, max_entries: int = DEFAULT_MAX_ENTRIES) -> "ResponseCache":
+        """Load a persisted cache, or start an empty one if the file is missing or unreadable"""
+        cache = cls(max_entries=max_entries, path=path)
+        try:
+            with open(path) as f:
+                for url, digest in json.load(f):
+                    cache._store(url, digest)
+        except (FileNotFoundError, ValueError, TypeError):
+            pass
+        return cache
+
+    def save(self, path: Optional[str] = None) -> None:
+        """Atomically persist the cache, least recently seen first"""
+        path = path or self.path
+        if not path:
+            raise ValueError("No path to save the response cache to")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(list(self._entries.items()), f)
+        os.replace(tmp_path, path)
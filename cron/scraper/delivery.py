@@ -0,0 +1,219 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Dict, Any, List, Optional, Union
+
+import requests
+
+from config import (
+    DELIVERY_BATCH_SIZE,
+    DELIVERY_FLUSH_INTERVAL,
+    DELIVERY_OUTBOX,
+    DELIVERY_QUEUE_SIZE,
+    DELIVERY_THREADS,
+    DELIVERY_TIMEOUT,
+)
+from http_client import get_client
+from metrics import metrics
+from outbox import Outbox, OutboxSender
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()  # Sentinel telling a sender thread to exit
+
+
+class OddsSender:
+    """
+    Background delivery of processed odds to an endpoint.
+
+    Payloads are put on a bounded queue and drained by sender threads that
+    group them into batches (by size or by age) and POST each batch as a
+    single JSON array over a keep-alive connection pool. When the queue is
+    full, `send` blocks, which pushes back on the parse loop instead of
+    buffering without limit.
+    """
+
+    def __init__(self, endpoint: str,
+                 batch_size: int = DELIVERY_BATCH_SIZE,
+                 flush_interval: float = DELIVERY_FLUSH_INTERVAL,
+                 max_queue_size: int = DELIVERY_QUEUE_SIZE,
+                 num_threads: int = DELIVERY_THREADS,
+                 timeout: float = DELIVERY_TIMEOUT):
+        self.endpoint = endpoint
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self.sent = 0     # Payloads delivered successfully
+        self.failed = 0   # Payloads dropped after a failed POST
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._closed = False
+        self._lock = threading.Lock()
+
+        self._threads = [
+            threading.Thread(target=self._run, name=f"odds-sender-{n}", daemon=True)
+            for n in range(max(1, num_threads))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def send(self, payload: Dict[str, Any], block: bool = True, timeout: Optional[float] = None) -> bool:
+        """
+        Queue a payload for delivery.
+
+        Args:
+            payload (Dict[str, Any]): JSON-serialisable payload
+            block (bool): Wait for room when the queue is full
+            timeout (Optional[float]): Max seconds to wait when blocking
+
+        Returns:
+            bool: True if queued, False if the queue was full and the payload was dropped
+        """
+        if self._closed:
+            raise RuntimeError("Sender is closed")
+        try:
+            self._queue.put(payload, block=block, timeout=timeout)
+            return True
+        except queue.Full:
+            with self._lock:
+                self.failed += 1
+            metrics.inc('scraper_delivery_payloads_total', outcome='dropped')
+            logger.warning(f"Delivery queue full, dropped payload for {self.endpoint}")
+            return False
+
+    def flush(self) -> None:
+        """Block until every queued payload has been delivered or dropped"""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Flush outstanding payloads and stop the sender threads"""
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                return
+
+            batch = [item]
+            stop = False
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            try:
+                self._post(batch)
+            finally:
+                for _ in range(len(batch) + stop):
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _post(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            with metrics.timer('scraper_stage_seconds', stage='post'):
+                response = get_client().post(self.endpoint, json=batch, timeout=self.timeout)
+                response.raise_for_status()
+            with self._lock:
+                self.sent += len(batch)
+            metrics.inc('scraper_delivery_payloads_total', len(batch), outcome='sent')
+            metrics.inc('scraper_delivery_batches_total')
+        except requests.exceptions.RequestException as e:
+            with self._lock:
+                self.failed += len(batch)
+            metrics.inc('scraper_delivery_payloads_total', len(batch), outcome='failed')
+            logger.error(f"Failed to send {len(batch)} payloads to endpoint: {str(e)}")
+
+
+_senders: Dict[str, Union[OddsSender, OutboxSender]] = {}
+_senders_lock = threading.Lock()
+_outbox_path: Optional[str] = DELIVERY_OUTBOX
+_outbox: Optional[Outbox] = None
+
+
+def use_outbox(path: Optional[str]) -> None:
+    """
+    Route deliveries through a durable SQLite outbox instead of direct POSTs.
+
+    Must be called before the first payload is sent. The outbox is replayed to
+    the endpoints separately (see outbox.py).
+    """
+    global _outbox_path
+    with _senders_lock:
+        if _senders:
+            raise RuntimeError("use_outbox() must be called before any payload is sent")
+        _outbox_path = path
+
+
+def get_sender(endpoint: str) -> Union[OddsSender, OutboxSender]:
+    """Get the shared sender for an endpoint, starting it on first use"""
+    global _outbox
+    with _senders_lock:
+        sender = _senders.get(endpoint)
+        if sender is None:
+            if _outbox_path:
+                if _outbox is None:
+                    _outbox = Outbox(_outbox_path)
+                sender = OutboxSender(_outbox, endpoint)
+            else:
+                sender = OddsSender(endpoint)
+            _senders[endpoint] = sender
+        return sender
+
+
+def flush_senders() -> None:
+    """Wait for every shared sender to drain its queue"""
+    with _senders_lock:
+        senders = list(_senders.values())
+    for sender in senders:
+        sender.flush()
+
+
+def failed_payloads() -> int:
+    """Total payloads the shared senders have dropped so far"""
+    with _senders_lock:
+        senders = list(_senders.values())
+    # Outbox senders keep failed payloads on disk, so they never drop any
+    return sum(getattr(sender, 'failed', 0) for sender in senders)
+
+
+def _reset_senders_after_fork() -> None:
+    # A forked child (e.g. a process pool worker) inherits the parent's senders
+    # but not their threads, so it must start its own.
+    global _senders_lock, _outbox
+    _senders.clear()
+    _senders_lock = threading.Lock()
+    _outbox = None  # SQLite connections must not cross a fork
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_senders_after_fork)
+
+
+@atexit.register
+def close_senders() -> None:
+    """Flush and stop every shared sender"""
+    with _senders_lock:
+        senders = list(_senders.values())
+        _senders.clear()
+    for sender in senders:
+        sender.close()
@@ -0,0 +1,103 @@
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+# (player_name, type) -> {value: odds}
+Lines = Dict[Tuple[str, str], Dict[str, str]]
+
+# (source, stat_type, url)
+Market = Tuple[str, Optional[str], Optional[str]]
+
+
+def _lines(processed_data: Dict[str, Any]) -> Lines:
+    lines: Lines = {}
+    for player in processed_data.get('players', []):
+        for odds in player['odds']:
+            lines.setdefault((player['player_name'], odds['type']), {})[odds['value']] = odds['odds']
+    return lines
+
+
+class SnapshotStore:
+    """
+    Last known lines for every market, used to emit only what changed.
+
+    Lines are keyed by (source, stat_type, url, player_name, type) and hold the
+    odds for each threshold value; the url tells apart competitions that share a
+    stat. Each parse of a market replaces the previous one, so a line missing
+    from the new parse is reported as removed.
+    """
+
+    def __init__(self):
+        self._markets: Dict[Market, Lines] = {}
+        self._touched: Optional[Set[Market]] = None
+
+    def diff(self, processed_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Record a parsed market and return what changed since its last parse.
+
+        Args:
+            processed_data (Dict[str, Any]): Output of a parser's process_traffic
+
+        Returns:
+            Optional[Dict[str, Any]]: A delta payload, or None if nothing changed.
+            It carries the same source/url/timestamp/stat_type metadata as the
+            full payload plus:
+                added:   [[player_name, type, value, odds], ...]
+                changed: [[player_name, type, value, odds], ...] (new odds)
+                removed: [[player_name, type, value], ...]
+        """
+        market = (processed_data.get('source'), processed_data.get('stat_type'), processed_data.get('url'))
+        new = _lines(processed_data)
+        old = self._markets.get(market, {})
+        self._markets[market] = new
+        if self._touched is not None:
+            self._touched.add(market)
+
+        added: List[List[str]] = []
+        changed: List[List[str]] = []
+        removed: List[List[str]] = []
+        for key, values in new.items():
+            old_values = old.get(key, {})
+            for value, odds in values.items():
+                old_odds = old_values.get(value)
+                if old_odds is None:
+                    added.append([*key, value, odds])
+                elif old_odds != odds:
+                    changed.append([*key, value, odds])
+        for key, old_values in old.items():
+            values = new.get(key, {})
+            for value in old_values:
+                if value not in values:
+                    removed.append([*key, value])
+
+        if not (added or changed or removed):
+            return None
+        return {
+            'source': processed_data.get('source'),
+            'url': processed_data.get('url'),
+            'timestamp': processed_data.get('timestamp'),
+            'stat_type': processed_data.get('stat_type'),
+            'delta': True,
+            'added': added,
+            'changed': changed,
+            'removed': removed,
+        }
+
+    def track_changes(self) -> None:
+        """Start recording which markets are diffed from now on, for changes()"""
+        self._touched = set()
+
+    def changes(self) -> "SnapshotStore":
+        """A store holding only the markets diffed since track_changes(), for merge()"""
+        changes = SnapshotStore()
+        changes._markets = {market: self._markets[market] for market in self._touched or ()}
+        return changes
+
+    def merge(self, other: "SnapshotStore") -> None:
+        """
+        Take the latest snapshots recorded by another store. For a worker
+        process's copy, pass its changes() so markets it only inherited cannot
+        revert ones advanced by other workers.
+        """
+        self._markets.update(other._markets)
+
+    def __len__(self) -> int:
+        return len(self._markets)
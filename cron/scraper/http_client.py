@@ -0,0 +1,183 @@
+"""
+Shared HTTP client for every outbound call.
+
+One `requests.Session` keeps a keep-alive connection pool per host, so the
+many small requests made by the player scripts and the odds delivery threads
+reuse TCP/TLS connections instead of paying a handshake each time. The client
+adds default timeouts, retries with jittered exponential backoff for
+idempotent requests, and hooks that receive the timing of every attempt.
+
+Used from the scraper as `http_client` and from the repository root as
+`cron.scraper.http_client`, so it depends only on the standard library and
+requests. Configured with environment variables:
+
+    HTTP_CONNECT_TIMEOUT  seconds to establish a connection (default 5)
+    HTTP_READ_TIMEOUT     seconds to wait for response data (default 30)
+    HTTP_RETRIES          retries for idempotent requests (default 3)
+    HTTP_POOL_SIZE        keep-alive connections per host (default 16)
+"""
+import logging
+import os
+import random
+import threading
+import time
+from typing import Callable, List, NamedTuple, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))
+POOL_HOSTS = 10         # Hosts whose connection pools are kept open at once
+BACKOFF = 0.5           # Base retry delay in seconds, doubled per attempt
+MAX_BACKOFF = 10.0      # Cap on a single retry delay
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUSES = frozenset({502, 503, 504})
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+class RequestTiming(NamedTuple):
+    """One request attempt, as passed to timing hooks"""
+    method: str
+    url: str
+    host: str
+    status: Optional[int]    # None if no response was received
+    seconds: float
+    attempt: int             # 0 for the first try
+    error: Optional[str] = None
+
+
+Hook = Callable[[RequestTiming], None]
+
+
+class HttpClient:
+    """
+    Pooled HTTP client with default timeouts, jittered retries and timing hooks.
+
+    Safe to share between threads. Non-idempotent requests (POST, PATCH) are
+    sent once unless `idempotent=True` is passed, so a batch is never inserted
+    twice because a response was lost.
+    """
+
+    def __init__(self, timeout: Timeout = (CONNECT_TIMEOUT, READ_TIMEOUT), retries: int = RETRIES,
+                 pool_maxsize: int = POOL_SIZE, backoff: float = BACKOFF, max_backoff: float = MAX_BACKOFF):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.pool_maxsize = pool_maxsize
+        self.hooks: List[Hook] = []
+        self.session = self._new_session()
+
+    def _new_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=self.pool_maxsize)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def add_hook(self, hook: Hook) -> None:
+        """Call `hook` with a RequestTiming after every attempt"""
+        self.hooks.append(hook)
+
+    def request(self, method: str, url: str, idempotent: Optional[bool] = None,
+                before_attempt: Optional[Callable[[], None]] = None, **kwargs) -> requests.Response:
+        """
+        Send a request, retrying connection errors, timeouts and 502/503/504
+        responses when it is idempotent.
+
+        Args:
+            method (str): HTTP method
+            url (str): Request URL
+            idempotent (Optional[bool]): Whether retrying is safe; defaults to
+                True for GET, HEAD, OPTIONS, PUT and DELETE
+            before_attempt (Optional[Callable[[], None]]): Called before every
+                attempt, retries included, e.g. to take a rate limiter token
+            **kwargs: Passed to requests (params, json, data, headers, timeout, ...)
+
+        Returns:
+            requests.Response: The final response, whatever its status
+
+        Raises:
+            requests.exceptions.RequestException: If the last attempt failed
+                without a response
+        """
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        retries = self.retries if idempotent else 0
+        kwargs.setdefault("timeout", self.timeout)
+        host = urlsplit(url).netloc
+
+        for attempt in range(retries + 1):
+            if before_attempt is not None:
+                before_attempt()
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self._emit(RequestTiming(method, url, host, None, time.perf_counter() - start, attempt, str(e)))
+                if attempt == retries:
+                    raise
+                self._sleep(attempt, f"{method} {url} failed: {str(e)}")
+                continue
+
+            self._emit(RequestTiming(method, url, host, response.status_code, time.perf_counter() - start, attempt))
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                return response
+            self._sleep(attempt, f"{method} {url} returned {response.status_code}")
+            response.close()
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def close(self) -> None:
+        self.session.close()
+
+    def _sleep(self, attempt: int, reason: str) -> None:
+        # Full jitter keeps clients that failed together from retrying together
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        logger.warning(f"{reason}; retrying in {delay:.2f}s")
+        time.sleep(delay)
+
+    def _emit(self, timing: RequestTiming) -> None:
+        for hook in self.hooks:
+            try:
+                hook(timing)
+            except Exception as e:
+                logger.error(f"HTTP timing hook failed: {str(e)}")
+
+
+_client: Optional[HttpClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> HttpClient:
+    """The process-wide client, created on first use"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
+
+
+def _reset_client_after_fork() -> None:
+    # Pooled sockets must not be shared with a forked child; settings and hooks carry over
+    global _client_lock
+    _client_lock = threading.Lock()
+    if _client is not None:
+        _client.session = _client._new_session()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_client_after_fork)
@@ -0,0 +1,238 @@
+"""
+Streaming JSON record files.
+
+Writes records one at a time as either a compact JSON array or
+newline-delimited JSON, optionally gzip-compressed, and reads them back one
+record at a time, so neither side holds a whole dump in memory. The format is
+chosen from the file name:
+
+    players.json        compact array: [{...},{...}]
+    players.ndjson      one record per line (.jsonl also works)
+    players.json.gz     either of the above, gzip-compressed
+
+Array files may be wrapped in an envelope such as players_ingestion.py's
+{"timestamp": ..., "data": [...]}; the reader accepts those, and also the
+indented files written before this module existed. NDJSON files carry the
+envelope's other fields on a first line of the form {"_envelope": {...}}.
+
+Used from the scraper as `jsonstream` and from the repository root as
+`cron.scraper.jsonstream`.
+"""
+import gzip
+import json
+from typing import Any, Dict, IO, Iterable, Iterator, Optional
+
+ENVELOPE_KEY = "_envelope"
+READ_CHUNK = 1 << 16
+
+_encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False, default=str)
+_decoder = json.JSONDecoder()
+
+
+def is_ndjson(path: str) -> bool:
+    if path.endswith(".gz"):
+        path = path[:-len(".gz")]
+    return path.endswith((".ndjson", ".jsonl"))
+
+
+def output_path(stem: str, ndjson: bool = False, compress: bool = False) -> str:
+    """File name for a dump: stem + .json or .ndjson, plus .gz when compressed"""
+    return stem + (".ndjson" if ndjson else ".json") + (".gz" if compress else "")
+
+
+def _open(path: str, mode: str) -> IO[str]:
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class JsonStreamWriter:
+    """
+    Write records to a JSON array or NDJSON file as they are produced.
+
+    Use as a context manager; the closing bracket (and envelope) is written
+    on exit.
+
+    Args:
+        path (str): Output path; the format and compression follow its suffix
+        envelope (Optional[Dict[str, Any]]): Extra top-level fields, written
+            around the records as {**envelope, "data": [...]}
+        data_key (str): Key of the record array inside the envelope
+    """
+
+    def __init__(self, path: str, envelope: Optional[Dict[str, Any]] = None, data_key: str = "data"):
+        self.path = path
+        self.ndjson = is_ndjson(path)
+        self.count = 0
+        self._file = _open(path, "w")
+        self._envelope = envelope is not None
+        if self.ndjson:
+            if envelope:
+                self._file.write(_encoder.encode({ENVELOPE_KEY: envelope}) + "\n")
+        elif self._envelope:
+            # Everything but the closing "]}" of {"timestamp":...,"data":[...]}
+            head = _encoder.encode({**envelope, data_key: []})
+            self._file.write(head[:-2])
+        else:
+            self._file.write("[")
+
+    def write(self, record: Any) -> None:
+        encoded = _encoder.encode(record)
+        if self.ndjson:
+            self._file.write(encoded + "\n")
+        else:
+            self._file.write(("," if self.count else "") + encoded)
+        self.count += 1
+
+    def write_many(self, records: Iterable[Any]) -> int:
+        """Write every record; returns how many were written"""
+        before = self.count
+        for record in records:
+            self.write(record)
+        return self.count - before
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        if not self.ndjson:
+            self._file.write("]}" if self._envelope else "]")
+            self._file.write("\n")
+        self._file.close()
+
+    def __enter__(self) -> "JsonStreamWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class JsonStreamReader:
+    """
+    Iterate the records of a file written by JsonStreamWriter (or any JSON
+    array, enveloped array or NDJSON file) without loading it whole.
+
+    `envelope` holds the file's top-level fields other than the records. For
+    enveloped arrays, fields that come after the record array are only filled
+    in once iteration finishes.
+    """
+
+    def __init__(self, path: str, data_key: str = "data"):
+        self.path = path
+        self.data_key = data_key
+        self.envelope: Dict[str, Any] = {}
+
+    def __iter__(self) -> Iterator[Any]:
+        with _open(self.path, "r") as f:
+            if is_ndjson(self.path):
+                yield from self._ndjson(f)
+            else:
+                yield from _ArrayScanner(f).records(self.data_key, self.envelope)
+
+    def _ndjson(self, f: IO[str]) -> Iterator[Any]:
+        # Lines are decoded a chunk at a time as one array, which is much
+        # cheaper than a json.loads call per line
+        for lines in iter(lambda: f.readlines(READ_CHUNK), []):
+            lines = [line for line in lines if not line.isspace()]
+            try:
+                records = json.loads("[" + ",".join(lines) + "]")
+            except json.JSONDecodeError:
+                records = None
+            if records is None or len(records) != len(lines):
+                # Decode line by line so a bad line raises its own error
+                records = [json.loads(line) for line in lines]
+            for record in records:
+                if isinstance(record, dict) and ENVELOPE_KEY in record and len(record) == 1:
+                    self.envelope.update(record[ENVELOPE_KEY])
+                    continue
+                yield record
+
+
+def iter_records(path: str, data_key: str = "data") -> Iterator[Any]:
+    """Records of a JSON array, enveloped array or NDJSON file, one at a time"""
+    return iter(JsonStreamReader(path, data_key))
+
+
+def write_records(path: str, records: Iterable[Any], envelope: Optional[Dict[str, Any]] = None) -> int:
+    """Write records to `path` in the format its suffix names; returns how many were written"""
+    with JsonStreamWriter(path, envelope) as writer:
+        return writer.write_many(records)
+
+
+class _ArrayScanner:
+    """Incremental tokenizer for a top-level array or an object holding one"""
+
+    def __init__(self, f: IO[str]):
+        self._f = f
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        chunk = self._f.read(READ_CHUNK)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _peek(self) -> str:
+        """Next non-whitespace character, without consuming it ('' at end of file)"""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in " \t\r\n":
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, chars: str) -> str:
+        c = self._peek()
+        if not c or c not in chars:
+            raise ValueError(f"Expected one of {chars!r} in JSON stream, found {c or 'end of file'!r}")
+        self._pos += 1
+        return c
+
+    def _value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def _array(self) -> Iterator[Any]:
+        self._expect("[")
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self._value()
+            if self._expect(",]") == "]":
+                return
+
+    def records(self, data_key: str, envelope: Dict[str, Any]) -> Iterator[Any]:
+        if self._peek() == "[":
+            yield from self._array()
+            return
+        self._expect("{")
+        if self._peek() == "}":
+            return
+        while True:
+            key = self._value()
+            self._expect(":")
+            if key == data_key and self._peek() == "[":
+                yield from self._array()
+            else:
+                envelope[key] = self._value()
+            if self._expect(",}") == "}":
+                return
@@ -1,11 +1,22 @@
 import json
 import os
 import logging
-from typing import Optional, List, Dict, Any
-from mitmproxy import io
+import time
+from typing import Optional, List, Dict, Any, Iterator, NamedTuple
+from mitmproxy import io, exceptions
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
+from checkpoint import Checkpoint, load_checkpoint, save_checkpoint
+from dedup import ResponseCache
+from delivery import failed_payloads, flush_senders, use_outbox
+from delta import SnapshotStore
+from http_client import RequestTiming, get_client
+from metrics import Metrics, metrics
+from name_index import get_name_index, use_name_index
 from parsers.base import parser_factory
+from parsers.traffic import TrafficView
 from parsers.bet365 import Bet365Parser  # This will register the parser
 
 # Configure logging
@@ -15,17 +26,57 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-PRODUCTION_SERVER_IP = os.getenv("PRODUCTION_SERVER_IP")
-PRODUCTION_SERVER_PORT = "8000"
-PRODUCTION_SERVER_ENDPOINT = f"http://{PRODUCTION_SERVER_IP}:{PRODUCTION_SERVER_PORT}/api/odds"
 
+CHECKPOINT_EVERY = 100  # Flows between checkpoint saves when resuming
+FOLLOW_POLL_INTERVAL = 1.0  # Seconds to wait for a followed file to grow
 
-def process_traffic_file(file_path: str) -> List[Dict[str, Any]]:
+
+def _read_flows(f, checkpoint: Checkpoint, follow: bool = False,
+                poll_interval: float = FOLLOW_POLL_INTERVAL) -> Iterator[Any]:
+    """
+    Yield flows from an open capture file starting at the checkpoint offset.
+
+    The checkpoint is advanced past each flow as it is yielded. In follow mode
+    reaching the end of the file (or a flow mitmproxy has only half written)
+    waits for the file to grow instead of stopping.
+    """
+    f.seek(checkpoint.offset)
+    while True:
+        try:
+            for flow in io.FlowReader(f).stream():
+                checkpoint.offset = f.tell()
+                checkpoint.flows += 1
+                yield flow
+        except exceptions.FlowReadException:
+            if not follow:
+                raise
+            # Partially written flow at the end of the file; re-read it once complete
+        if not follow:
+            return
+        f.seek(checkpoint.offset)
+        time.sleep(poll_interval)
+
+def _record_http_timing(timing: RequestTiming) -> None:
+    metrics.observe('scraper_http_seconds', timing.seconds, host=timing.host, method=timing.method,
+                    status=timing.status or 'error')
+
+def process_traffic_file(file_path: str, resume: bool = False, follow: bool = False,
+                         dedup: Optional[ResponseCache] = None,
+                         snapshots: Optional[SnapshotStore] = None) -> List[Dict[str, Any]]:
     """
     Process a traffic.mitm file and route requests to appropriate parsers based on URL
     
     Args:
         file_path (str): Path to the traffic.mitm file
+        resume (bool): Start from the file's saved checkpoint and keep it updated,
+            so reruns only process flows added since the last run
+        follow (bool): Keep tailing the file for new flows while mitmproxy is still
+            writing it (implies resume). Runs until interrupted; results are sent
+            but not retained.
+        dedup (Optional[ResponseCache]): Skip responses identical to the last one
+            seen for the same URL, before parsing them
+        snapshots (Optional[SnapshotStore]): Send only the lines that changed since
+            the last parse of each market instead of the full market
         
     Returns:
         List[Dict[str, Any]]: List of processed odds data from all parsers
@@ -34,11 +85,33 @@ def process_traffic_file(file_path: str) -> List[Dict[str, Any]]:
         raise FileNotFoundError(f"Traffic file not found at {file_path}")
     
     all_odds = []  # Store all processed odds data
+    resume = resume or follow
+    checkpoint = load_checkpoint(file_path) if resume else Checkpoint()
+    if checkpoint.offset:
+        logger.info(f"Resuming {file_path} after {checkpoint.flows} flows (byte {checkpoint.offset})")
+
+    failed = failed_payloads()
+    stalled = False
+
+    def save() -> None:
+        # Only checkpoint flows whose results have actually been delivered. Once
+        # a batch is dropped the checkpoint stays put for the rest of the run, so
+        # --resume processes the undelivered flows again.
+        nonlocal stalled
+        flush_senders()
+        if not stalled and failed_payloads() > failed:
+            stalled = True
+            logger.warning(f"Delivery failed, keeping the last checkpoint for {file_path} "
+                           f"so --resume retries the undelivered flows")
+        if not stalled:
+            save_checkpoint(file_path, checkpoint)
         
     try:
         with open(file_path, "rb") as f:
-            flow_reader = io.FlowReader(f)
-            for flow in flow_reader.stream():
+            flows = metrics.timed_iter(_read_flows(f, checkpoint, follow=follow),
+                                       'scraper_stage_seconds', stage='decode')
+            for flow in flows:
+                parser_name = None
                 try:
                     # Extract URL from the flow
                     url = flow.request.url
@@ -46,56 +119,136 @@ def process_traffic_file(file_path: str) -> List[Dict[str, Any]]:
                     try:
                         # Get appropriate parser for the URL
                         parser = parser_factory.get_parser_for_url(url)
+                        parser_name = type(parser).__name__
                         
                         # Prepare traffic data in the format expected by parsers
-                        traffic_data = {
-                            'request': {
-                                'url': url,
-                                'method': flow.request.method,
-                                'headers': dict(flow.request.headers),
-                                'content': flow.request.content.decode('utf-8') if flow.request.content else ''
-                            },
-                            'response': {
-                                'status_code': flow.response.status_code,
-                                'headers': dict(flow.response.headers),
-                                'content': flow.response.content.decode('utf-8') if flow.response.content else ''
-                            },
-                            'timestamp': flow.timestamp_start
-                        }
+                        traffic_data = TrafficView(flow)
+
+                        # Skip unchanged responses before spending time parsing them
+                        if dedup is not None and dedup.seen(url, traffic_data.raw_response_content):
+                            logger.debug(f"Skipping unchanged response for URL: {url}")
+                            metrics.inc('scraper_flows_total', parser=parser_name, outcome='unchanged')
+                            continue
                         
                         # Process the traffic data
-                        processed_data = parser.process_traffic(traffic_data)
+                        with metrics.timer('scraper_stage_seconds', stage='parse', parser=parser_name):
+                            processed_data = parser.process_traffic(traffic_data)
                         print(f"Processed data: {processed_data['stat_type']}")
+
+                        # Attach player and team ids when a name index is loaded
+                        names = get_name_index()
+                        if names is not None:
+                            with metrics.timer('scraper_stage_seconds', stage='resolve', parser=parser_name):
+                                names.annotate(processed_data)
                         
-                        # Send to endpoint
-                        parser.send_to_endpoint(processed_data)
+                        # Queue for delivery; sending overlaps with parsing the next flow
+                        if snapshots is None:
+                            parser.send_to_endpoint(processed_data)
+                        else:
+                            delta = snapshots.diff(processed_data)
+                            if delta is not None:
+                                parser.send_to_endpoint(delta)
                         
                         # Store the processed data
-                        all_odds.append(processed_data)
+                        if not follow:
+                            all_odds.append(processed_data)
                         
-                        logger.info(f"Successfully processed and sent data for URL: {url}")
+                        metrics.inc('scraper_flows_total', parser=parser_name, outcome='processed')
+                        logger.info(f"Successfully processed and queued data for URL: {url}")
                         
                     except ValueError:
                         # No parser found for URL - log and continue
                         logger.debug(f"No parser found for URL: {url}")
+                        metrics.inc('scraper_flows_total', parser='none', outcome='unrouted')
                         continue
                         
                 except Exception as e:
                     logger.error(f"Error processing flow in {file_path}: {str(e)}")
+                    metrics.inc('scraper_flows_total', parser=parser_name or 'none', outcome='error')
                     continue
+
+                finally:
+                    if resume and checkpoint.flows % CHECKPOINT_EVERY == 0:
+                        save()
                     
+    except KeyboardInterrupt:
+        if not follow:
+            raise
+        logger.info(f"Stopped following {file_path}")
     except Exception as e:
         logger.error(f"Error reading MITM file {file_path}: {str(e)}")
         raise
+    finally:
+        if resume:
+            save()
         
     return all_odds
 
-def process_directory(directory: str = "scrape-data") -> List[Dict[str, Any]]:
+class FileResult(NamedTuple):
+    """Outcome of processing one file in a worker process"""
+    file_path: str
+    data: List[Dict[str, Any]]
+    error: Optional[str] = None  # Error message if the file failed
+    dedup: Optional[ResponseCache] = None  # What the worker changed in the shared state,
+    snapshots: Optional[SnapshotStore] = None  # merged back by the parent
+    metrics: Optional[Metrics] = None
+
+def _process_file_worker(file_path: str, resume: bool = False, dedup: Optional[ResponseCache] = None,
+                         snapshots: Optional[SnapshotStore] = None, collect_metrics: bool = False) -> FileResult:
+    """
+    Process a single file inside a worker process.
+
+    Errors are caught here rather than propagated so that one bad capture
+    cannot take down the pool or the other files' results.
+
+    Args:
+        file_path (str): Path to the traffic.mitm file
+        resume (bool): Resume from the file's saved checkpoint
+        dedup (Optional[ResponseCache]): This worker's copy of the response cache
+        snapshots (Optional[SnapshotStore]): This worker's copy of the market snapshots
+        collect_metrics (bool): Record metrics for the parent to merge
+
+    Returns:
+        FileResult: The file's processed odds data or error, plus the changes it made
+        to the shared state
+    """
+    # Start from an empty registry so the parent never merges the same data twice
+    metrics.reset(enabled=collect_metrics)
+    # Likewise only this file's cache entries and snapshots go back, not the copy's inherited ones
+    if dedup is not None:
+        dedup.track_changes()
+    if snapshots is not None:
+        snapshots.track_changes()
+    error = None
+    file_data = []
+    try:
+        file_data = process_traffic_file(file_path, resume=resume, dedup=dedup, snapshots=snapshots)
+        # Pool workers exit without running atexit hooks, so flush explicitly
+        flush_senders()
+    except Exception as e:
+        error = str(e)
+    return FileResult(file_path, file_data, error,
+                      dedup.changes() if dedup is not None else None,
+                      snapshots.changes() if snapshots is not None else None,
+                      metrics if collect_metrics else None)
+
+def process_directory(directory: str = "scrape-data", workers: int = 1,
+                      resume: bool = False, dedup: Optional[ResponseCache] = None,
+                      snapshots: Optional[SnapshotStore] = None) -> List[Dict[str, Any]]:
     """
     Process all traffic.mitm files in the specified directory
     
     Args:
         directory (str): Directory containing traffic.mitm files
+        workers (int): Number of worker processes to fan the files out to.
+            With 1 (the default) files are processed in this process.
+        resume (bool): Resume each file from its saved checkpoint
+        dedup (Optional[ResponseCache]): Skip responses identical to the last one
+            seen for the same URL. The entries each worker process records are
+            merged back in file order.
+        snapshots (Optional[SnapshotStore]): Send only changed lines. Worker processes
+            diff against the snapshots as they were when the pool started, and the
+            markets each one diffs are merged back in file order.
         
     Returns:
         List[Dict[str, Any]]: Combined list of processed odds data from all files
@@ -104,16 +257,40 @@ def process_directory(directory: str = "scrape-data") -> List[Dict[str, Any]]:
         raise FileNotFoundError(f"Directory not found: {directory}")
     
     all_processed_data = []
-        
-    for filename in os.listdir(directory):
-        if filename.endswith('.mitm'):
-            file_path = os.path.join(directory, filename)
+    file_paths = [
+        os.path.join(directory, filename)
+        for filename in os.listdir(directory)
+        if filename.endswith('.mitm')
+    ]
+
+    if workers <= 1 or len(file_paths) <= 1:
+        for file_path in file_paths:
             logger.info(f"Processing {file_path}...")
             try:
-                file_data = process_traffic_file(file_path)
+                file_data = process_traffic_file(file_path, resume=resume, dedup=dedup, snapshots=snapshots)
                 all_processed_data.extend(file_data)
             except Exception as e:
                 logger.error(f"Failed to process {file_path}: {str(e)}")
+        return all_processed_data
+
+    logger.info(f"Processing {len(file_paths)} files with {workers} workers...")
+    with ProcessPoolExecutor(max_workers=min(workers, len(file_paths))) as executor:
+        # map() yields results in submission order as soon as each one is ready,
+        # so results stream back in the same order as the serial path.
+        worker = partial(_process_file_worker, resume=resume, dedup=dedup, snapshots=snapshots,
+                         collect_metrics=metrics.enabled)
+        for result in executor.map(worker, file_paths):
+            if dedup is not None and result.dedup is not None:
+                dedup.merge(result.dedup)
+            if snapshots is not None and result.snapshots is not None:
+                snapshots.merge(result.snapshots)
+            if result.metrics is not None:
+                metrics.merge(result.metrics)
+            if result.error is not None:
+                logger.error(f"Failed to process {result.file_path}: {result.error}")
+                continue
+            logger.info(f"Processed {result.file_path} ({len(result.data)} results)")
+            all_processed_data.extend(result.data)
                 
     return all_processed_data
 
@@ -133,15 +310,100 @@ def main():
         "--dir", "-d",
         help="Path to a directory containing .mitm files"
     )
+    parser.add_argument(
+        "--workers", "-w",
+        type=int,
+        default=1,
+        help="Number of worker processes used with --dir (default: 1)"
+    )
+    parser.add_argument(
+        "--resume", "-r",
+        action="store_true",
+        help="Skip flows already processed by a previous run (tracked in <file>.ckpt)"
+    )
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="Keep processing new flows as mitmproxy writes them (implies --resume)"
+    )
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Skip responses identical to the previous response for the same URL"
+    )
+    parser.add_argument(
+        "--dedup-cache",
+        metavar="PATH",
+        help="Persist the --dedup cache to PATH so it carries across runs (implies --dedup)"
+    )
+    parser.add_argument(
+        "--delta",
+        action="store_true",
+        help="Send only added, changed and removed lines instead of full market snapshots"
+    )
+    parser.add_argument(
+        "--outbox",
+        metavar="PATH",
+        help="Append payloads to a durable SQLite outbox at PATH instead of POSTing them; "
+             "deliver them with `python outbox.py --db PATH`"
+    )
+    parser.add_argument(
+        "--name-index",
+        metavar="PATH",
+        help="Add player_id and team_id to each parsed player using the name index at PATH "
+             "(built with `python name_index.py`)"
+    )
+    parser.add_argument(
+        "--metrics-out",
+        metavar="PATH",
+        help="Record per-stage counters and latencies and write them to PATH at the end of "
+             "the run (JSON if PATH ends in .json, Prometheus text otherwise)"
+    )
 
     args = parser.parse_args()
 
+    resume = args.resume or args.follow
+    if args.outbox:
+        use_outbox(args.outbox)
+    if args.name_index:
+        # Memory-mapped, so forked workers share its pages instead of copying it
+        use_name_index(args.name_index)
+    dedup = None
+    if args.dedup_cache:
+        dedup = ResponseCache.load(args.dedup_cache)
+    elif args.dedup:
+        dedup = ResponseCache()
+    snapshots = SnapshotStore() if args.delta else None
+    metrics.reset(enabled=bool(args.metrics_out))
+    if args.metrics_out:
+        get_client().add_hook(_record_http_timing)
+
     if args.file:
         logger.info(f"Processing single file: {args.file}")
-        process_traffic_file(args.file)
+        process_traffic_file(args.file, resume=resume, follow=args.follow, dedup=dedup, snapshots=snapshots)
+    elif args.follow:
+        # Each resumed pass only picks up flows (and files) added since the last one
+        logger.info(f"Following .mitm files in directory: {args.dir}")
+        try:
+            while True:
+                process_directory(args.dir, workers=args.workers, resume=True, dedup=dedup, snapshots=snapshots)
+                time.sleep(FOLLOW_POLL_INTERVAL)
+        except KeyboardInterrupt:
+            logger.info(f"Stopped following {args.dir}")
     elif args.dir:
         logger.info(f"Processing all .mitm files in directory: {args.dir}")
-        process_directory(args.dir)
+        process_directory(args.dir, workers=args.workers, resume=resume, dedup=dedup, snapshots=snapshots)
+
+    flush_senders()
+
+    if dedup is not None:
+        logger.info(f"Skipped {dedup.hits} unchanged responses ({dedup.misses} parsed)")
+        if dedup.path:
+            dedup.save()
+
+    if args.metrics_out:
+        metrics.write(args.metrics_out)
+        logger.info(f"Wrote metrics to {args.metrics_out}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,195 @@
+import bisect
+import json
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+# Latency bucket upper bounds in seconds (Prometheus `le` labels)
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+_NULL_TIMER = nullcontext()
+
+
+def _key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Histogram:
+    """Cumulative latency histogram with fixed buckets"""
+
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)  # Last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def merge(self, other: "Histogram") -> None:
+        for i, n in enumerate(other.counts):
+            self.counts[i] += n
+        self.total += other.total
+        self.count += other.count
+
+
+class Metrics:
+    """
+    Counters and latency histograms for the scraper pipeline.
+
+    Disabled by default: every recording call returns immediately, and `timer`
+    hands back a shared no-op context manager, so instrumented code pays only
+    an attribute check and a call when no metrics output was requested.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+
+    def reset(self, enabled: Optional[bool] = None) -> None:
+        """Drop everything recorded so far, optionally switching recording on or off"""
+        with self._lock:
+            self._counters = {}
+            self._histograms = {}
+        if enabled is not None:
+            self.enabled = enabled
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """Increment a counter"""
+        if not self.enabled:
+            return
+        key = _key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        """Record a latency in a histogram"""
+        if not self.enabled:
+            return
+        key = _key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(seconds)
+
+    def timer(self, name: str, **labels):
+        """Context manager recording the duration of its block in a histogram"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return self._timer(name, labels)
+
+    @contextmanager
+    def _timer(self, name: str, labels: Dict[str, Any]):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timed_iter(self, iterable: Iterable, name: str, **labels) -> Iterable:
+        """Wrap an iterable so the time taken to produce each item is recorded"""
+        if not self.enabled:
+            return iterable
+        return self._timed_iter(iterable, name, labels)
+
+    def _timed_iter(self, iterable: Iterable, name: str, labels: Dict[str, Any]) -> Iterator:
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.observe(name, time.perf_counter() - start, **labels)
+            yield item
+
+    def merge(self, other: "Metrics") -> None:
+        """Add another registry's data (e.g. from a worker process) into this one"""
+        with self._lock:
+            for name, series in other._counters.items():
+                mine = self._counters.setdefault(name, {})
+                for key, value in series.items():
+                    mine[key] = mine.get(key, 0) + value
+            for name, series in other._histograms.items():
+                mine = self._histograms.setdefault(name, {})
+                for key, histogram in series.items():
+                    mine.setdefault(key, Histogram()).merge(histogram)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'enabled': self.enabled, '_counters': self._counters, '_histograms': self._histograms}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def to_json(self) -> Dict[str, Any]:
+        """Metrics as a JSON-serialisable dict"""
+        with self._lock:
+            counters = [
+                {'name': name, 'labels': dict(key), 'value': value}
+                for name, series in sorted(self._counters.items())
+                for key, value in sorted(series.items())
+            ]
+            histograms = [
+                {
+                    'name': name,
+                    'labels': dict(key),
+                    'count': h.count,
+                    'sum': h.total,
+                    'mean': h.total / h.count if h.count else 0.0,
+                    'buckets': dict(zip([str(b) for b in LATENCY_BUCKETS] + ['+Inf'], h.counts)),
+                }
+                for name, series in sorted(self._histograms.items())
+                for key, h in sorted(series.items())
+            ]
+        return {'counters': counters, 'histograms': histograms}
+
+    def to_prometheus(self) -> str:
+        """Metrics in the Prometheus text exposition format"""
+        def fmt(key: LabelKey, extra: List[Tuple[str, str]] = ()) -> str:
+            pairs = list(key) + list(extra)
+            if not pairs:
+                return ''
+            return '{' + ','.join(f'{k}="{v}"' for k, v in pairs) + '}'
+
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{fmt(key)} {value}")
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for key, h in sorted(series.items()):
+                    cumulative = 0
+                    for bound, n in zip([str(b) for b in LATENCY_BUCKETS] + ['+Inf'], h.counts):
+                        cumulative += n
+                        lines.append(f"{name}_bucket{fmt(key, [('le', bound)])} {cumulative}")
+                    lines.append(f"{name}_sum{fmt(key)} {h.total}")
+                    lines.append(f"{name}_count{fmt(key)} {h.count}")
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str) -> None:
+        """Write metrics to a file: JSON if the path ends in .json, Prometheus text otherwise"""
+        with open(path, 'w') as f:
+            if path.endswith('.json'):
+                json.dump(self.to_json(), f, indent=2)
+            else:
+                f.write(self.to_prometheus())
+
+
+# Global metrics registry
+metrics = Metrics()
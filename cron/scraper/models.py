@@ -1,6 +1,13 @@
 from pydantic import BaseModel, Field, HttpUrl
-from typing import Optional
+from typing import Any, Dict, Iterable, List, Optional, Type, TypeVar
+from functools import lru_cache
 import datetime
+import json
+
+try:
+    from pydantic import TypeAdapter  # pydantic v2
+except ImportError:
+    TypeAdapter = None
 
 # ---------------------------
 # Books Payload
@@ -133,4 +140,45 @@ class UserAccountPayload(BaseModel):
     account_type: Optional[str] = Field(default="standard")  # e.g., "admin", "standard".
     linked_accounts: Optional[str] = None  # JSON blob to store external account info.
 
-#TODO: Add more models for other variables in the future.
\ No newline at end of file
+#TODO: Add more models for other variables in the future.
+
+# ---------------------------
+# Bulk helpers
+# ---------------------------
+# Building models one at a time repeats the per-call validation setup for every
+# row. These work on whole lists: one validation call per batch and a single
+# serialisation pass.
+
+Model = TypeVar("Model", bound=BaseModel)
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(model: Type[BaseModel]):
+    # Building a TypeAdapter compiles a validator, so keep one per model
+    return TypeAdapter(List[model])
+
+
+def validate_batch(model: Type[Model], items: Iterable[Dict[str, Any]]) -> List[Model]:
+    """Validate a whole list of payload dicts in one call (raises ValidationError)"""
+    if TypeAdapter is not None:
+        return _list_adapter(model).validate_python(list(items))
+    from pydantic import parse_obj_as
+    return parse_obj_as(List[model], list(items))
+
+
+def dump_batch(items: List[BaseModel]) -> List[Dict[str, Any]]:
+    """Models as plain dicts, the bulk equivalent of [item.dict() for item in items]"""
+    if not items:
+        return []
+    if TypeAdapter is not None:
+        return _list_adapter(type(items[0])).dump_python(items)
+    return [item.dict() for item in items]
+
+
+def dump_batch_json(items: List[BaseModel], indent: Optional[int] = None) -> str:
+    """Serialise a list of models to a JSON array in one pass"""
+    if not items:
+        return "[]"
+    if TypeAdapter is not None:
+        return _list_adapter(type(items[0])).dump_json(items, indent=indent).decode()
+    return json.dumps([item.dict() for item in items], indent=indent, default=str)
\ No newline at end of file
@@ -0,0 +1,418 @@
+"""
+Player and team name resolution for sportsbook names.
+
+Sportsbook payloads only carry display names ("LeBron James"), while the
+database keys odds by player and team ids. A NameIndex is built once from the
+ingested players and teams, written to a compact binary file and memory-mapped
+at startup, so every process (including forked workers) shares the same pages
+and nothing is parsed on load.
+
+Each name is looked up by a normalized exact key first (accents, punctuation,
+case and Jr./III suffixes removed). Names with no exact key fall back to a
+character trigram index scored by Dice similarity. Build an index from the
+repository root with:
+
+    python cron/scraper/name_index.py --db cron/ballknower.db --out names.idx
+
+An index built with --db resolves to the database's players.id and teams.id,
+the ids OddsPayload.player_id references. One built from JSON files with
+--players/--teams resolves to whatever ids the files carry: balldontlie ids
+for players_data.json, which do not match the database's ids.
+"""
+import argparse
+import bisect
+import hashlib
+import json
+import math
+import mmap
+import re
+import sqlite3
+import struct
+import sys
+import unicodedata
+import zlib
+from array import array
+from collections import Counter
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from jsonstream import iter_records
+
+MAGIC = b'BKNX'
+VERSION = 1
+DEFAULT_MIN_SCORE = 0.6  # Dice similarity a fuzzy match needs to be accepted
+CACHE_SIZE = 65536       # Resolved names remembered per index
+
+_HEADER = struct.Struct('<4sBcxx')     # magic, version, byte order; 8 bytes keeps sections aligned
+_TABLE_HEADER = struct.Struct('<IIII')  # entries, keys, grams, postings
+
+_PUNCTUATION = re.compile(r"[.'’`]")
+_SEPARATORS = re.compile(r"[^a-z0-9]+")
+_SUFFIXES = {'jr', 'sr', 'ii', 'iii', 'iv', 'v'}
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase ASCII form of a name used as its exact key ('Luka Dončić Jr.' -> 'luka doncic')"""
+    if not name.isascii():
+        name = unicodedata.normalize('NFKD', name)
+        name = ''.join(c for c in name if not unicodedata.combining(c))
+    name = name.lower()
+    tokens = _SEPARATORS.sub(' ', _PUNCTUATION.sub('', name)).split()
+    if len(tokens) > 1 and tokens[-1] in _SUFFIXES:
+        tokens.pop()
+    return ' '.join(tokens)
+
+
+def _key_hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'little')
+
+
+def _grams(key: str) -> List[int]:
+    """Distinct character trigrams of a normalized key, as 32-bit ids"""
+    padded = f" {key} "
+    return sorted({zlib.crc32(padded[i:i + 3].encode()) for i in range(len(padded) - 2)})
+
+
+class Match(NamedTuple):
+    """A resolved name"""
+    id: int
+    team_id: Optional[int]
+    name: str      # Name as stored in the index
+    score: float   # 1.0 for an exact key, Dice similarity for a fuzzy match
+
+
+class _Table:
+    """
+    One searchable set of names (players or teams) over flat typed arrays.
+
+    Entries are stored column-wise: ids, team ids, trigram counts and UTF-8
+    names addressed by offset. Exact keys are a sorted array of 64-bit hashes
+    with a parallel array of entry numbers; trigrams are a sorted array of
+    gram ids with offsets into one postings array.
+    """
+
+    SECTIONS = (('ids', 'q'), ('team_ids', 'q'), ('gram_counts', 'I'), ('name_offsets', 'I'),
+                ('names', 'B'), ('key_hashes', 'Q'), ('key_entries', 'I'),
+                ('gram_keys', 'I'), ('gram_offsets', 'I'), ('postings', 'I'))
+
+    def __init__(self, sections: Dict[str, Sequence[int]]):
+        for name, _ in self.SECTIONS:
+            setattr(self, name, sections[name])
+
+    @classmethod
+    def build(cls, rows: Iterable[Tuple[int, Optional[int], List[str]]]) -> "_Table":
+        """
+        Args:
+            rows: (id, team_id, names) per entry; the first name is the display
+                name and the rest are aliases that resolve to the same entry
+        """
+        ids, team_ids, gram_counts = array('q'), array('q'), array('I')
+        name_offsets, names = array('I', [0]), bytearray()
+        keys: List[Tuple[int, int]] = []
+        postings: Dict[int, List[int]] = {}
+        for entry, (entry_id, team_id, aliases) in enumerate(rows):
+            ids.append(entry_id)
+            team_ids.append(-1 if team_id is None else team_id)
+            names += aliases[0].encode()
+            name_offsets.append(len(names))
+            entry_grams = set()
+            for alias in aliases:
+                key = normalize_name(alias)
+                if not key:
+                    continue
+                keys.append((_key_hash(key), entry))
+                entry_grams.update(_grams(key))
+            gram_counts.append(len(entry_grams))
+            for gram in entry_grams:
+                postings.setdefault(gram, []).append(entry)
+
+        # Drop aliases that repeat a key for the same entry
+        keys = sorted(set(keys))
+        gram_keys, gram_offsets, flat = array('I'), array('I', [0]), array('I')
+        for gram in sorted(postings):
+            gram_keys.append(gram)
+            flat.extend(postings[gram])
+            gram_offsets.append(len(flat))
+        return cls({
+            'ids': ids, 'team_ids': team_ids, 'gram_counts': gram_counts,
+            'name_offsets': name_offsets, 'names': names,
+            'key_hashes': array('Q', [h for h, _ in keys]),
+            'key_entries': array('I', [e for _, e in keys]),
+            'gram_keys': gram_keys, 'gram_offsets': gram_offsets, 'postings': flat,
+        })
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def match(self, entry: int, score: float) -> Match:
+        team_id = self.team_ids[entry]
+        name = bytes(self.names[self.name_offsets[entry]:self.name_offsets[entry + 1]]).decode()
+        return Match(self.ids[entry], None if team_id < 0 else team_id, name, score)
+
+    def exact(self, key: str) -> List[int]:
+        """Entries whose exact key is `key`"""
+        h = _key_hash(key)
+        lo = bisect.bisect_left(self.key_hashes, h)
+        hi = lo
+        while hi < len(self.key_hashes) and self.key_hashes[hi] == h:
+            hi += 1
+        return [self.key_entries[i] for i in range(lo, hi)]
+
+    def fuzzy(self, key: str, min_score: float) -> List[Tuple[float, int]]:
+        """(score, entry) pairs sharing enough trigrams with `key`, best first"""
+        grams = _grams(key)
+        postings = []
+        for gram in grams:
+            i = bisect.bisect_left(self.gram_keys, gram)
+            if i < len(self.gram_keys) and self.gram_keys[i] == gram:
+                postings.append(self.postings[self.gram_offsets[i]:self.gram_offsets[i + 1]])
+        postings.sort(key=len)
+
+        # A Dice score of min_score needs at least `needed` shared grams, so any
+        # match appears in one of the rarest len(grams) - needed + 1 lists. Only
+        # those seed candidates; the common lists just add to their counts.
+        # Counter.update and set intersection keep the inner loops in C.
+        needed = max(1, math.ceil(min_score * len(grams) / (2 - min_score) - 1e-9))
+        prefix = len(grams) - needed + 1
+        common = Counter()
+        for entries in postings[:prefix]:
+            common.update(entries)
+        for entries in postings[prefix:]:
+            common.update(common.keys() & set(entries))
+        scored = [
+            (2 * n / (len(grams) + self.gram_counts[entry]), entry)
+            for entry, n in common.items() if n >= needed
+        ]
+        return sorted((s for s in scored if s[0] >= min_score), key=lambda s: (-s[0], s[1]))
+
+    def dump(self) -> bytes:
+        parts = [_TABLE_HEADER.pack(len(self.ids), len(self.key_hashes), len(self.gram_keys), len(self.postings))]
+        for name, _ in self.SECTIONS:
+            data = bytes(getattr(self, name))
+            parts.append(data + b'\0' * (-len(data) % 8))  # Keep every section 8-byte aligned
+        return b''.join(parts)
+
+    @classmethod
+    def view(cls, buffer: memoryview, offset: int) -> Tuple["_Table", int]:
+        """Table over a buffer without copying it; returns the table and the offset after it"""
+        entries, keys, grams, postings = _TABLE_HEADER.unpack_from(buffer, offset)
+        offset += _TABLE_HEADER.size
+        sections = {}
+        for name, typecode in cls.SECTIONS:
+            count = {
+                'ids': entries, 'team_ids': entries, 'gram_counts': entries,
+                'name_offsets': entries + 1, 'key_hashes': keys, 'key_entries': keys,
+                'gram_keys': grams, 'gram_offsets': grams + 1, 'postings': postings,
+            }.get(name)
+            if name == 'names':
+                count = sections['name_offsets'][entries]
+            size = count * array(typecode).itemsize
+            sections[name] = buffer[offset:offset + size].cast(typecode)
+            offset += size + (-size % 8)
+        return cls(sections), offset
+
+
+class NameIndex:
+    """Resolves player and team names to ids"""
+
+    def __init__(self, players: _Table, teams: _Table, mapped: Optional[mmap.mmap] = None):
+        self.players = players
+        self.teams = teams
+        self._mmap = mapped
+        self._cache: Dict[Tuple[str, str, Optional[int]], Optional[Match]] = {}
+
+    @classmethod
+    def build(cls, players: Iterable[Dict[str, Any]], teams: Iterable[Dict[str, Any]] = ()) -> "NameIndex":
+        """
+        Build an index from player and team records.
+
+        Accepts the balldontlie records saved by players_ingestion.py
+        (first_name/last_name and a nested team) as well as the payload dicts
+        in players_seed.json/teams_seed.json (name and team_id).
+        """
+        return cls(_Table.build(_player_rows(players)), _Table.build(_team_rows(teams)))
+
+    @classmethod
+    def load(cls, path: str) -> "NameIndex":
+        """Memory-map an index written by save()"""
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buffer = memoryview(mapped)
+        magic, version, byteorder = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} name index")
+        if byteorder.decode() != sys.byteorder[0]:
+            raise ValueError(f"{path} was built on a machine with a different byte order")
+        players, offset = _Table.view(buffer, _HEADER.size)
+        teams, _ = _Table.view(buffer, offset)
+        return cls(players, teams, mapped)
+
+    def save(self, path: str) -> None:
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, sys.byteorder[0].encode()))
+            f.write(self.players.dump())
+            f.write(self.teams.dump())
+
+    def resolve(self, name: str, team_id: Optional[int] = None,
+                min_score: float = DEFAULT_MIN_SCORE) -> Optional[Match]:
+        """
+        Resolve a player name.
+
+        Args:
+            name (str): Name as the sportsbook shows it
+            team_id (Optional[int]): Team hint used to pick between players
+                sharing a name
+            min_score (float): Lowest Dice similarity accepted for a fuzzy match
+
+        Returns:
+            Optional[Match]: The player, or None if no entry (or more than one
+                equally good entry) matches
+        """
+        return self._resolve(self.players, 'player', name, team_id, min_score)
+
+    def resolve_team(self, name: str, min_score: float = DEFAULT_MIN_SCORE) -> Optional[Match]:
+        """Resolve a team by full name, nickname or abbreviation"""
+        return self._resolve(self.teams, 'team', name, None, min_score)
+
+    def resolve_batch(self, names: Iterable[str], min_score: float = DEFAULT_MIN_SCORE) -> List[Optional[Match]]:
+        """Resolve many player names; repeated names cost one dict lookup"""
+        return [self.resolve(name, min_score=min_score) for name in names]
+
+    def annotate(self, processed_data: Dict[str, Any], team_id: Optional[int] = None) -> int:
+        """
+        Add player_id and team_id to each player of a parsed market in place.
+
+        The ids are the ones the index was built from (see the module
+        docstring); only an index built with --db gives database ids.
+
+        Args:
+            processed_data (Dict[str, Any]): Output of a parser's process_traffic
+            team_id (Optional[int]): Team hint for every player; a team_id the
+                parser already set on a player takes precedence
+
+        Returns:
+            int: Number of players that were resolved
+        """
+        resolved = 0
+        for player in processed_data.get('players', ()):
+            hint = player.get('team_id')
+            match = self.resolve(player['player_name'], team_id=team_id if hint is None else hint)
+            player['player_id'] = match.id if match else None
+            player['team_id'] = match.team_id if match else None
+            resolved += match is not None
+        return resolved
+
+    def _resolve(self, table: _Table, kind: str, name: str, team_id: Optional[int],
+                 min_score: float) -> Optional[Match]:
+        cache_key = (kind, name, team_id)
+        try:
+            return self._cache[cache_key]
+        except KeyError:
+            pass
+        key = normalize_name(name)
+        match = None
+        if key:
+            entries = table.exact(key)
+            if entries:
+                match = _pick(table, [(1.0, e) for e in entries], team_id)
+            else:
+                match = _pick(table, table.fuzzy(key, min_score), team_id)
+        if len(self._cache) >= CACHE_SIZE:
+            self._cache.clear()
+        self._cache[cache_key] = match
+        return match
+
+
+def _pick(table: _Table, candidates: List[Tuple[float, int]], team_id: Optional[int]) -> Optional[Match]:
+    """The single best candidate, narrowed by team if that breaks a tie"""
+    if not candidates:
+        return None
+    best = max(score for score, _ in candidates)
+    top = [entry for score, entry in candidates if score == best]
+    if len(top) > 1 and team_id is not None:
+        top = [entry for entry in top if table.team_ids[entry] == team_id] or top
+    if len(set(top)) != 1:
+        return None
+    return table.match(top[0], best)
+
+
+def _player_rows(players: Iterable[Dict[str, Any]]) -> Iterable[Tuple[int, Optional[int], List[str]]]:
+    for player in players:
+        name = player.get('name') or f"{player.get('first_name') or ''} {player.get('last_name') or ''}".strip()
+        player_id = player.get('id')
+        if player_id is None and player.get('details'):
+            details = json.loads(player['details'])
+            player_id = details.get('player_id') or details.get('id')
+        if not name or player_id is None:
+            continue
+        team_id = player.get('team_id')
+        if team_id is None:
+            team_id = (player.get('team') or {}).get('id')
+        yield int(player_id), team_id, [name]
+
+
+def _team_rows(teams: Iterable[Dict[str, Any]]) -> Iterable[Tuple[int, Optional[int], List[str]]]:
+    for team in teams:
+        if team.get('id') is None:
+            continue
+        names = [team.get('full_name') or team.get('name')]
+        names += [team[alias] for alias in ('name', 'abbreviation') if team.get(alias)]
+        if names[0]:
+            yield team['id'], team['id'], names
+
+
+def database_records(path: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Player and team records from a cron/storage.py database, keyed by their database ids"""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    try:
+        players = [dict(row) for row in conn.execute("SELECT id, name, team_id FROM players")]
+        teams = [dict(row) for row in conn.execute("SELECT id, name, abbreviation FROM teams")]
+    finally:
+        conn.close()
+    return players, teams
+
+
+# ---------------------------
+# Process-wide index
+# ---------------------------
+_index: Optional[NameIndex] = None
+
+
+def use_name_index(path: Optional[str]) -> None:
+    """Memory-map the index at `path` for get_name_index(), or stop resolving names with None"""
+    global _index
+    _index = NameIndex.load(path) if path else None
+
+
+def get_name_index() -> Optional[NameIndex]:
+    return _index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a player and team name index.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--db", help="Database written by cron/storage.py; ids are its players.id/teams.id")
+    source.add_argument("--players",
+                        help="Players file (players_data.json or players_seed.json, optionally .ndjson/.gz); "
+                             "ids are the ones in the file")
+    parser.add_argument("--teams", help="Teams file (teams_data.json or teams_seed.json, optionally .ndjson/.gz)")
+    parser.add_argument("--out", required=True, help="Index file to write")
+    parser.add_argument("--lookup", nargs="*", default=[], help="Names to resolve with the new index")
+    args = parser.parse_args()
+
+    if args.db:
+        players, teams = database_records(args.db)
+    else:
+        # Records are streamed from JSON, enveloped JSON or NDJSON (see jsonstream.py)
+        players = iter_records(args.players)
+        teams = iter_records(args.teams) if args.teams else []
+
+    NameIndex.build(players, teams).save(args.out)
+    index = NameIndex.load(args.out)
+    print(f"Wrote {args.out}: {len(index.players)} players, {len(index.teams)} teams")
+    for name in args.lookup:
+        print(f"{name!r}: {index.resolve(name) or index.resolve_team(name)}")
+
+
+if __name__ == "__main__":
+    main()
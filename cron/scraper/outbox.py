@@ -0,0 +1,249 @@
+"""
+Durable local outbox for odds delivery.
+
+Parsed payloads are appended to a WAL-mode SQLite file instead of being
+POSTed directly, so capture processing never waits on (or loses data to) the
+production endpoint. A separate drainer replays the outbox in bulk:
+
+    python outbox.py --db outbox.db          # drain continuously
+    python outbox.py --db outbox.db --once   # drain what is there and exit
+
+Payloads an endpoint rejects outright (a 4xx other than 408 or 429) are moved
+to the `dead_letter` table with the response, so they cannot block the
+payloads queued behind them.
+"""
+import argparse
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+import requests
+
+from config import DELIVERY_TIMEOUT
+from http_client import get_client
+
+logger = logging.getLogger(__name__)
+
+COMMIT_EVERY = 200      # Appended payloads per commit
+COMMIT_INTERVAL = 0.5   # Max seconds an appended payload waits for a commit
+DRAIN_BATCH_SIZE = 500  # Payloads per bulk POST when draining
+MAX_BACKOFF = 60.0      # Cap on the retry delay in seconds
+
+# Client errors that are worth retrying: request timeout and rate limiting
+RETRYABLE_STATUS = (408, 429)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    endpoint TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS dead_letter (
+    id INTEGER PRIMARY KEY,
+    endpoint TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    failed_at REAL NOT NULL,
+    status INTEGER,
+    error TEXT
+);
+"""
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """Open an outbox database in WAL mode, creating it if needed"""
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL + NORMAL only risks the last commits on power loss, never corruption
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    conn.commit()
+    return conn
+
+
+class Outbox:
+    """Append-only writer side of the outbox, with batched commits"""
+
+    def __init__(self, path: str, commit_every: int = COMMIT_EVERY, commit_interval: float = COMMIT_INTERVAL):
+        self.path = path
+        self.commit_every = commit_every
+        self.commit_interval = commit_interval
+        self._conn = connect(path)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._last_commit = time.monotonic()
+
+    def append(self, endpoint: str, payload: Dict[str, Any]) -> None:
+        """Add a payload; it is durable once the current batch is committed"""
+        row = (endpoint, json.dumps(payload), time.time())
+        with self._lock:
+            self._conn.execute("INSERT INTO outbox (endpoint, payload, created_at) VALUES (?, ?, ?)", row)
+            self._pending += 1
+            if (self._pending >= self.commit_every
+                    or time.monotonic() - self._last_commit >= self.commit_interval):
+                self._commit()
+
+    def flush(self) -> None:
+        """Commit every appended payload"""
+        with self._lock:
+            self._commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._commit()
+            self._conn.close()
+
+    def _commit(self) -> None:
+        if self._pending:
+            self._conn.commit()
+            self._pending = 0
+        self._last_commit = time.monotonic()
+
+
+class OutboxSender:
+    """Drop-in replacement for delivery.OddsSender that writes to an outbox"""
+
+    def __init__(self, outbox: Outbox, endpoint: str):
+        self.outbox = outbox
+        self.endpoint = endpoint
+
+    def send(self, payload: Dict[str, Any], block: bool = True, timeout: Optional[float] = None) -> bool:
+        # Appending is a local write, so it never needs to drop or wait on the network
+        self.outbox.append(self.endpoint, payload)
+        return True
+
+    def flush(self) -> None:
+        self.outbox.flush()
+
+    def close(self) -> None:
+        self.outbox.flush()
+
+
+def _next_batch(conn: sqlite3.Connection, batch_size: int) -> Tuple[Optional[str], List[Tuple[int, str]]]:
+    """Oldest payloads for the endpoint at the head of the outbox, in insertion order"""
+    head = conn.execute("SELECT endpoint FROM outbox ORDER BY id LIMIT 1").fetchone()
+    if head is None:
+        return None, []
+    rows = conn.execute(
+        "SELECT id, payload FROM outbox WHERE endpoint = ? ORDER BY id LIMIT ?",
+        (head[0], batch_size)
+    ).fetchall()
+    return head[0], rows
+
+
+def _is_permanent(error: requests.exceptions.RequestException) -> bool:
+    """Whether the endpoint rejected the request itself, so resending it cannot succeed"""
+    status = error.response.status_code if error.response is not None else None
+    return status is not None and 400 <= status < 500 and status not in RETRYABLE_STATUS
+
+
+def _dead_letter(conn: sqlite3.Connection, rows: List[Tuple[int, str]],
+                 error: requests.exceptions.HTTPError) -> None:
+    """Move rejected payloads out of the outbox, keeping the response for inspection"""
+    row_ids = [(row_id,) for row_id, _ in rows]
+    status = error.response.status_code
+    detail = (error.response.text or str(error))[:1000]
+    with conn:
+        conn.executemany(
+            "INSERT INTO dead_letter (id, endpoint, payload, created_at, failed_at, status, error) "
+            "SELECT id, endpoint, payload, created_at, ?, ?, ? FROM outbox WHERE id = ?",
+            [(time.time(), status, detail, row_id) for row_id, in row_ids]
+        )
+        conn.executemany("DELETE FROM outbox WHERE id = ?", row_ids)
+
+
+def drain(path: str, batch_size: int = DRAIN_BATCH_SIZE, once: bool = False,
+          poll_interval: float = 1.0, max_backoff: float = MAX_BACKOFF) -> int:
+    """
+    Replay outbox payloads to their endpoints in bulk, oldest first.
+
+    Each batch is POSTed as a single JSON array and deleted only after the
+    endpoint accepts it, so delivery is at-least-once. Failures are retried
+    with capped, jittered exponential backoff. When the endpoint rejects a
+    batch with a permanent 4xx, the batch is halved until the rejected payload
+    is isolated, and that payload is moved to `dead_letter`.
+
+    Args:
+        path (str): Outbox database path
+        batch_size (int): Max payloads per POST
+        once (bool): Return once the outbox is empty instead of waiting for more
+        poll_interval (float): Seconds between checks of an empty outbox
+        max_backoff (float): Cap on the retry delay in seconds
+
+    Returns:
+        int: Number of payloads delivered
+    """
+    conn = connect(path)
+    client = get_client()
+    delivered = 0
+    failures = 0
+    limit = batch_size
+    try:
+        while True:
+            endpoint, rows = _next_batch(conn, limit)
+            if not rows:
+                if once:
+                    return delivered
+                time.sleep(poll_interval)
+                continue
+
+            # Rows already hold serialised JSON, so splice them into an array as-is
+            body = "[" + ",".join(payload for _, payload in rows) + "]"
+            try:
+                response = client.post(endpoint, data=body, timeout=DELIVERY_TIMEOUT,
+                                        headers={"Content-Type": "application/json"})
+                response.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                if _is_permanent(e):
+                    if len(rows) > 1:
+                        # Find the payload the endpoint objects to without dropping the rest
+                        limit = len(rows) // 2
+                        continue
+                    logger.error(f"{endpoint} rejected outbox payload {rows[0][0]}: {str(e)}; "
+                                 f"moved to dead_letter")
+                    _dead_letter(conn, rows, e)
+                    limit = batch_size
+                    continue
+                failures += 1
+                delay = min(max_backoff, 2 ** (failures - 1)) * random.uniform(0.5, 1.0)
+                logger.warning(f"Failed to deliver {len(rows)} payloads to {endpoint} "
+                               f"(attempt {failures}): {str(e)}; retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            failures = 0
+            limit = min(batch_size, limit * 2)
+            with conn:
+                conn.executemany("DELETE FROM outbox WHERE id = ?", [(row_id,) for row_id, _ in rows])
+            delivered += len(rows)
+            logger.info(f"Delivered {len(rows)} payloads to {endpoint}")
+    finally:
+        conn.close()
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    parser = argparse.ArgumentParser(description="Replay the odds outbox to its endpoints.")
+    parser.add_argument("--db", required=True, help="Path to the outbox database")
+    parser.add_argument("--batch-size", type=int, default=DRAIN_BATCH_SIZE,
+                        help=f"Payloads per bulk POST (default: {DRAIN_BATCH_SIZE})")
+    parser.add_argument("--once", action="store_true", help="Exit once the outbox is empty")
+    args = parser.parse_args()
+
+    try:
+        delivered = drain(args.db, batch_size=args.batch_size, once=args.once)
+        logger.info(f"Delivered {delivered} payloads")
+    except KeyboardInterrupt:
+        logger.info("Stopped draining")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,10 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
-import requests
-import os
-from dotenv import load_dotenv
+from typing import Dict, Any, Mapping, Union
 
-load_dotenv()
+from config import PRODUCTION_SERVER_ENDPOINT
+from delivery import get_sender
+from metrics import metrics
+from .records import OddsBatch
 
 
 class BaseParser(ABC):
@@ -16,17 +16,31 @@ class BaseParser(ABC):
         pass
         
     @abstractmethod
-    def process_traffic(self, traffic_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Process the traffic data and return processed results"""
+    def process_traffic(self, traffic_data: Mapping[str, Any], compact: bool = False) -> Union[Dict[str, Any], OddsBatch]:
+        """
+        Process the traffic data and return processed results.
+
+        `traffic_data` is usually a lazy `parsers.traffic.TrafficView`, so only
+        read the parts of the request and response the parser needs; a plain
+        dict of the same shape is also accepted.
+
+        With compact=True a parser may return its lines as a
+        `parsers.records.OddsBatch` instead of a dict; parsers without a
+        compact form accept the flag and return the usual dict.
+        """
         pass
         
-    def send_to_endpoint(self, processed_data: Dict[str, Any], endpoint: str = PRODUCTION_SERVER_ENDPOINT) -> None:
-        """Send processed data to the configured endpoint"""
-        try:
-            response = requests.post(PRODUCTION_SERVER_ENDPOINT, json=processed_data)
-            response.raise_for_status()
-        except requests.exceptions.RequestException as e:
-            raise Exception(f"Failed to send data to endpoint: {str(e)}")
+    def send_to_endpoint(self, processed_data: Dict[str, Any], endpoint: str = PRODUCTION_SERVER_ENDPOINT,
+                         block: bool = True) -> bool:
+        """
+        Queue processed data for batched delivery to the configured endpoint.
+
+        Returns as soon as the payload is queued; background sender threads
+        POST it along with other queued payloads. Use `delivery.flush_senders()`
+        to wait for delivery.
+        """
+        with metrics.timer('scraper_stage_seconds', stage='send', parser=type(self).__name__):
+            return get_sender(endpoint).send(processed_data, block=block)
 
 class ParserFactory:
     """Factory class for creating and managing parsers"""
@@ -40,9 +54,10 @@ class ParserFactory:
         
     def get_parser_for_url(self, url: str) -> BaseParser:
         """Get the appropriate parser for the given URL"""
-        for parser in self.parsers:
-            if parser.can_handle_url(url):
-                return parser
+        with metrics.timer('scraper_stage_seconds', stage='route'):
+            for parser in self.parsers:
+                if parser.can_handle_url(url):
+                    return parser
         raise ValueError(f"No parser found for URL: {url}")
 
 # Global parser factory instance
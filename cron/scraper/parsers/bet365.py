@@ -1,16 +1,12 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Mapping, Union
 from datetime import datetime
 from .base import BaseParser, parser_factory
+from .odds_math import fractional_to_decimal
+from .records import OddsBatch
 
 def convert_to_decimal_odds(fractional_odds: str) -> float:
     """Convert fractional odds to decimal format"""
-    if not fractional_odds or '/' not in fractional_odds:
-        return None
-    try:
-        num, denom = map(int, fractional_odds.split('/'))
-        return round((num / denom) + 1, 3)
-    except (ValueError, ZeroDivisionError):
-        return None
+    return fractional_to_decimal(fractional_odds)
 
 def parse_date(bc_value: str) -> str:
     """Parse date from Bet365 format to standard format"""
@@ -19,35 +15,141 @@ def parse_date(bc_value: str) -> str:
     except ValueError:
         return bc_value
 
+class _Record:
+    """A single `|`-delimited Bet365 record, split into its fields once"""
+
+    __slots__ = ('raw', 'parts', 'fields', '_first')
+
+    def __init__(self, raw: str):
+        self.raw = raw
+        self.parts = raw.split(';')
+        # KEY=VALUE fields; like the wire format's readers, a value ends at the next '='.
+        # A repeated key keeps its last value in `fields`; the first is kept aside for first()
+        fields = {}
+        first = None
+        for part in self.parts:
+            key, sep, rest = part.partition('=')
+            if sep:
+                if key in fields:
+                    if first is None:
+                        first = {}
+                    first.setdefault(key, fields[key])
+                fields[key] = rest.partition('=')[0]
+        self.fields = fields
+        self._first = first
+
+    def first(self, key: str):
+        """Value of the first `key` field (fields.get gives the last when a key repeats)"""
+        if self._first is not None and key in self._first:
+            return self._first[key]
+        return self.fields.get(key)
+
+    def label(self) -> str:
+        """Value of the record's first field (the market label on LS=1 records)"""
+        parts = self.parts[1].split('=') if len(self.parts) > 1 else ()
+        if len(parts) < 2:
+            raise ValueError(f"Malformed market label record: {self.raw!r}")
+        return parts[1]
+
+
+class _Market:
+    """
+    Odds being collected for one stat as nested dicts, with players indexed by name.
+
+    Shares its player_id/add interface with records.OddsBatch so the parsing
+    loops can fill either.
+    """
+
+    __slots__ = ('odds', 'entries')
+
+    def __init__(self, stat: str = None):
+        self.odds = {'stat': stat, 'players': []}
+        self.entries = {}
+
+    def player_id(self, name: str) -> Dict:
+        entry = self.entries.get(name)
+        if entry is None:
+            entry = self.entries[name] = {'player_name': name, 'odds': []}
+            self.odds['players'].append(entry)
+        return entry
+
+    def add(self, player: Dict, value: str, odds: str, type: str) -> None:
+        player['odds'].append({
+            'value': value,
+            'odds': odds,
+            'type': type
+        })
+
+
+def _tokenize(data_string: str):
+    """
+    Split a Bet365 payload into records and find its stat name in the same pass.
+
+    Returns:
+        Tuple[List[_Record], Optional[str], List[_Record], int]: The records, the first
+        stat label in the payload, the LS=1 records before the first player record,
+        and the index of that first player record
+    """
+    records = []
+    first_stat = None
+    header = []
+    first_player = -1
+    for raw in data_string.split('|'):
+        record = _Record(raw)
+        if first_player < 0 and raw.startswith('PA;'):
+            first_player = len(records)
+        if 'LS=1' in raw:
+            if first_player < 0:
+                header.append(record)
+            if first_stat is None:
+                label = record.label()
+                if label != 'More':
+                    first_stat = label
+        records.append(record)
+    if first_player < 0:
+        first_player = len(records)
+    return records, first_stat, header, first_player
+
+
+def _header_stat(header: List[_Record]):
+    """Last stat label among the LS=1 records before the first player, or None"""
+    stat = None
+    for record in header:
+        label = record.label()
+        if label != 'More':
+            stat = label
+    return stat
+
+
 class Bet365Parser(BaseParser):
     """Parser for Bet365 traffic data"""
     
     BET365_URL = "https://www.bet365.com.au/matchmarketscontentapi/markets"
+    STANDARD_STATS = ('Threes Made', 'Points', 'Assists', 'Rebounds')
     
     def can_handle_url(self, url: str) -> bool:
         return self.BET365_URL in url
 
-    def _parse_standard_stats(self, records: List[str], odds: Dict, current_players: List[str], 
-                            player_map: Dict[str, str], i: int) -> Dict:
+    def _parse_standard_stats(self, records: List[_Record], market: Union[_Market, OddsBatch],
+                            current_players: List[str], player_map: Dict[str, str], i: int) -> None:
         """Handle parsing for Threes Made, Points, Assists, Rebounds"""
-        while i < len(records):
+        n = len(records)
+        while i < n:
             record = records[i]
+            raw = record.raw
             
             # New match starts
-            if record.startswith('MG;'):
+            if raw.startswith('MG;'):
                 current_players = []  # Reset players for new match
                 i += 1
                 continue
 
             # Player record
-            if record.startswith('PA;') and 'PC' in record:
-                parts = record.split(';')
-                pid = name = None
-                for part in parts:
-                    if part.startswith('ID='):
-                        pid = part.split('=')[1][2:]  # Remove 'PC' prefix
-                    elif part.startswith('NA='):
-                        name = part.split('=')[1]
+            if raw.startswith('PA;') and 'PC' in raw:
+                pid = record.fields.get('ID')
+                name = record.fields.get('NA')
+                if pid is not None:
+                    pid = pid[2:]  # Remove 'PC' prefix
                 if pid and name:
                     player_map[pid] = name
                     current_players.append(pid)  # Add to ordered list
@@ -55,152 +157,122 @@ class Bet365Parser(BaseParser):
                 continue
                 
             # Stats column with odds
-            if record.startswith('CO;'):
-                value = None
-                for part in record.split(';'):
-                    if part.startswith('NA='):
-                        value = part.split('=')[1]
-                        break
+            if raw.startswith('CO;'):
+                value = record.first('NA')
                 
                 # Process odds for each player in order
                 i += 1
                 player_index = 0
-                while i < len(records) and not records[i].startswith('MG') and not records[i].startswith('CO;'):
+                while i < n and not records[i].raw.startswith('MG') and not records[i].raw.startswith('CO;'):
                     entry = records[i]
-                    if entry.startswith('PA;') and 'OD=' in entry:
-                        parts = entry.split(';')
-                        odds_val = None
-                        for part in parts:
-                            if part.startswith('OD='):
-                                odds_val = part.split('=')[1]
-                                break
+                    if entry.raw.startswith('PA;') and 'OD=' in entry.raw:
+                        odds_val = entry.first('OD')
                         
                         if player_index < len(current_players):
                             pid = current_players[player_index]
                             if pid in player_map:
-                                pname = player_map[pid]
-                                player_entry = next((p for p in odds['players'] if p['player_name'] == pname), None)
-                                if not player_entry:
-                                    player_entry = {'player_name': pname, 'odds': []}
-                                    odds['players'].append(player_entry)
+                                player = market.player_id(player_map[pid])
                                 if odds_val and value:
-                                    player_entry['odds'].append({
-                                        'value': value,
-                                        'odds': odds_val,
-                                        'type': 'over'
-                                    })
+                                    market.add(player, value, odds_val, 'over')
                         player_index += 1
                     i += 1
             else:
                 i += 1
-        return odds
-
-    def _parse_over_under_stats(self, records: List[str], odds: Dict, current_players: List[str], i: int) -> Dict:
-        """Parse Over/Under stats for players"""
-        while i < len(records) and not records[i].startswith('PA;'):
-            record = records[i]
-            if 'LS=1' in record and record.split(';')[1].split('=')[1] != 'More':
-                odds['stat'] = record.split(';')[1].split('=')[1]
-            i += 1
 
-        while i < len(records):
+    def _parse_over_under_stats(self, records: List[_Record], market: Union[_Market, OddsBatch],
+                                current_players: List[str], i: int) -> None:
+        """Parse Over/Under stats for players, starting at the first player record"""
+        n = len(records)
+        while i < n:
             record = records[i]
+            raw = record.raw
 
             # New match
-            if record.startswith('MG;'):
+            if raw.startswith('MG;'):
                 current_players.clear()
                 i += 2  # Skip next 'MA' record
                 continue
 
             # Initial player list with names
-            elif record.startswith('PA;') and 'NA=' in record:
-                parts = record.split(';')
-                name = None
-                for part in parts:
-                    if part.startswith('NA='):
-                        name = part.split('=')[1]
+            elif raw.startswith('PA;') and 'NA=' in raw:
+                name = record.fields.get('NA')
                 if name:
                     current_players.append(name)
                 i += 1
                 continue
 
             # Over/Under market
-            elif record.startswith('MA;'):
-                is_over = 'Over' in record
+            elif raw.startswith('MA;'):
+                is_over = 'Over' in raw
                 i += 1
                 player_index = 0
 
-                while i < len(records) and not (records[i].startswith('MG;') or records[i].startswith('MA;')):
+                while i < n and not (records[i].raw.startswith('MG;') or records[i].raw.startswith('MA;')):
                     entry = records[i]
 
-                    if entry.startswith('PA;') and 'OD=' in entry and 'HA=' in entry:
-                        parts = entry.split(';')
-                        odds_val = value = None
-                        for part in parts:
-                            if part.startswith('OD='):
-                                odds_val = part.split('=')[1]
-                            elif part.startswith('HA='):
-                                value = part.split('=')[1]
+                    if entry.raw.startswith('PA;') and 'OD=' in entry.raw and 'HA=' in entry.raw:
+                        odds_val = entry.fields.get('OD')
+                        value = entry.fields.get('HA')
 
                         if player_index < len(current_players):
-                            pname = current_players[player_index]
-                            player_entry = next((p for p in odds['players'] if p['player_name'] == pname), None)
-                            if not player_entry:
-                                player_entry = {'player_name': pname, 'odds': []}
-                                odds['players'].append(player_entry)
+                            player = market.player_id(current_players[player_index])
                             if value and odds_val:
-                                player_entry['odds'].append({
-                                    'value': value,
-                                    'odds': odds_val,
-                                    'type': 'over' if is_over else 'under'
-                                })
+                                market.add(player, value, odds_val, 'over' if is_over else 'under')
                         player_index += 1
                     i += 1
             else:
                 i += 1
 
-        return odds
-
-    def _parse_bet365_data(self, data_string: str) -> Dict:
-        """Parse Bet365 data string into structured format"""
-        records = data_string.split('|')
-        
-        odds = {
-            'stat': None,
-            'players': []
-        }
+    def _parse_bet365_data(self, data_string: str, compact: bool = False) -> Union[Dict, OddsBatch]:
+        """Parse Bet365 data string into structured format (an OddsBatch if compact)"""
+        records, stat, header, first_player = _tokenize(data_string)
+        standard = stat in self.STANDARD_STATS
+        if not standard:
+            # Over/Under markets take their stat from the header records before the players
+            header_stat = _header_stat(header)
+            if header_stat is not None:
+                stat = header_stat
+        market = OddsBatch(stat) if compact else _Market(stat)
         
         current_players = []  # Track players in order for current match
         player_map = {}  # Keep the global player map for reference
-        i = 0
-
-        # Get stat name
-        for record in records:
-            if 'LS=1' in record and record.split(';')[1].split('=')[1] != 'More':
-                odds['stat'] = record.split(';')[1].split('=')[1]
-                break
 
-        if odds['stat'] in ['Threes Made', 'Points', 'Assists', 'Rebounds']:
-            return self._parse_standard_stats(records, odds, current_players, player_map, i)
+        if standard:
+            self._parse_standard_stats(records, market, current_players, player_map, 0)
         else:
-            return self._parse_over_under_stats(records, odds, current_players, i)
+            self._parse_over_under_stats(records, market, current_players, first_player)
+        return market if compact else market.odds
         
-    def process_traffic(self, traffic_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Process Bet365 traffic data and return processed results"""
+    def process_traffic(self, traffic_data: Mapping[str, Any], compact: bool = False) -> Union[Dict[str, Any], OddsBatch]:
+        """Process Bet365 traffic data and return processed results.
+
+        Only the request URL, timestamp and response body are read, so with a
+        lazy TrafficView the request body and headers are never decoded.
+        With compact=True the lines come back as an OddsBatch; its
+        to_payload() gives the usual dict.
+        """
         try:
             # Extract response content
             response_content = traffic_data.get('response', {}).get('content', '')
             if not response_content:
                 raise ValueError("No response content found in traffic data")
                 
+            url = traffic_data.get('request', {}).get('url', '')
+            timestamp = traffic_data.get('timestamp', '')
+
+            if compact:
+                batch = self._parse_bet365_data(response_content, compact=True)
+                batch.source, batch.url, batch.timestamp = 'bet365', url, timestamp
+                return batch
+
             # Parse the response data
             odds_data = self._parse_bet365_data(response_content)
             
             # Add metadata
             processed_data = {
                 'source': 'bet365',
-                'url': traffic_data.get('request', {}).get('url', ''),
-                'timestamp': traffic_data.get('timestamp', ''),
+                'url': url,
+                'timestamp': timestamp,
                 'stat_type': odds_data.get('stat'),
                 'players': odds_data.get('players', [])
             }
@@ -0,0 +1,156 @@
+"""
+Odds conversions between fractional, decimal, American and implied probability.
+
+Scalar conversions are memoized: a sportsbook only ever quotes a few hundred
+distinct fractional prices, so each is parsed once. The `*_array` functions
+convert whole NumPy arrays in one call and need numpy installed.
+"""
+import math
+from functools import lru_cache
+from typing import Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for the array functions
+    np = None
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("numpy is required for array odds conversions: pip install numpy")
+
+
+# ---------------------------
+# Scalar conversions
+# ---------------------------
+@lru_cache(maxsize=8192)
+def fractional_to_decimal(fractional_odds: str) -> Optional[float]:
+    """Convert fractional odds ('11/10') to decimal odds (2.1), or None if invalid"""
+    if not fractional_odds or '/' not in fractional_odds:
+        return None
+    try:
+        num, denom = map(int, fractional_odds.split('/'))
+        return round((num / denom) + 1, 3)
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+def decimal_to_american(decimal_odds: float) -> float:
+    """Convert decimal odds to American odds (+150 / -200); NaN for 1.0, which pays nothing"""
+    if decimal_odds == 1:
+        return math.nan
+    if decimal_odds >= 2:
+        return (decimal_odds - 1) * 100
+    return -100 / (decimal_odds - 1)
+
+
+def american_to_decimal(american_odds: float) -> float:
+    """Convert American odds to decimal odds; NaN for 0, which is not a valid price"""
+    if american_odds == 0:
+        return math.nan
+    if american_odds > 0:
+        return american_odds / 100 + 1
+    return 100 / -american_odds + 1
+
+
+def _reciprocal(x: float) -> float:
+    # Infinite at 0 like NumPy's 1 / x, rather than raising ZeroDivisionError
+    if x == 0:
+        return math.copysign(math.inf, x)
+    return 1 / x
+
+
+def decimal_to_implied(decimal_odds: float) -> float:
+    """Implied probability of decimal odds, including the bookmaker's margin; inf for 0"""
+    return _reciprocal(decimal_odds)
+
+
+def implied_to_decimal(probability: float) -> float:
+    """Fair decimal odds for a probability; inf for 0"""
+    return _reciprocal(probability)
+
+
+def remove_vig(probabilities: Sequence[float]) -> list:
+    """
+    Strip the bookmaker's margin from the implied probabilities of one market's
+    mutually exclusive outcomes (e.g. an over and its under) by normalising them
+    to sum to 1.
+    """
+    total = sum(probabilities)
+    return [p / total for p in probabilities]
+
+
+# ---------------------------
+# Array conversions
+# ---------------------------
+def fractional_to_decimal_array(fractional_odds: Sequence[str]) -> "np.ndarray":
+    """
+    Convert an array of fractional odds strings to decimal odds.
+
+    Each distinct string is converted once; invalid strings become NaN.
+    """
+    _require_numpy()
+    # A fixed-width string array sorts in C; None and other junk become strings that fail to parse
+    values = np.asarray(fractional_odds)
+    if values.dtype.kind != 'U':
+        values = values.astype(str)
+    if values.size == 0:
+        return np.empty(values.shape, dtype=np.float64)
+    distinct, inverse = np.unique(values, return_inverse=True)
+    converted = np.array([fractional_to_decimal(str(v)) for v in distinct], dtype=np.float64)
+    return converted[inverse].reshape(values.shape)
+
+
+def decimal_to_american_array(decimal_odds) -> "np.ndarray":
+    """Convert decimal odds to American odds element-wise (NaN where the odds are 1.0)"""
+    _require_numpy()
+    decimal_odds = np.asarray(decimal_odds, dtype=np.float64)
+    profit = decimal_odds - 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        american = np.where(decimal_odds >= 2, profit * 100, -100 / profit)
+    return np.where(profit == 0, np.nan, american)
+
+
+def american_to_decimal_array(american_odds) -> "np.ndarray":
+    """Convert American odds to decimal odds element-wise (NaN where the odds are 0)"""
+    _require_numpy()
+    american_odds = np.asarray(american_odds, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        decimal = np.where(american_odds > 0, american_odds / 100 + 1, 100 / -american_odds + 1)
+    return np.where(american_odds == 0, np.nan, decimal)
+
+
+def decimal_to_implied_array(decimal_odds) -> "np.ndarray":
+    """Implied probabilities of decimal odds element-wise (inf where the odds are 0)"""
+    _require_numpy()
+    with np.errstate(divide='ignore'):
+        return 1 / np.asarray(decimal_odds, dtype=np.float64)
+
+
+def implied_to_decimal_array(probabilities) -> "np.ndarray":
+    """Fair decimal odds of probabilities element-wise (inf where the probability is 0)"""
+    _require_numpy()
+    with np.errstate(divide='ignore'):
+        return 1 / np.asarray(probabilities, dtype=np.float64)
+
+
+def fractional_to_implied_array(fractional_odds: Sequence[str]) -> "np.ndarray":
+    """Implied probabilities straight from fractional odds strings"""
+    return decimal_to_implied_array(fractional_to_decimal_array(fractional_odds))
+
+
+def remove_vig_array(probabilities, axis: int = -1) -> "np.ndarray":
+    """
+    Normalise implied probabilities so each market sums to 1.
+
+    Args:
+        probabilities: Array whose `axis` holds the outcomes of one market,
+            e.g. shape (n, 2) for n over/under pairs
+        axis (int): Axis holding the outcomes
+
+    Returns:
+        np.ndarray: Margin-free probabilities with the same shape
+    """
+    _require_numpy()
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    return probabilities / probabilities.sum(axis=axis, keepdims=True)
@@ -0,0 +1,125 @@
+import math
+import sys
+from array import array
+from functools import lru_cache
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+from .odds_math import fractional_to_decimal
+
+OVER = 'over'
+UNDER = 'under'
+
+
+@lru_cache(maxsize=4096)
+def _value(raw: str) -> Tuple[str, float]:
+    """Intern a threshold string ('20.5', '25+') and parse its number (NaN if none)"""
+    try:
+        threshold = float(raw.rstrip('+'))
+    except ValueError:
+        threshold = math.nan
+    return sys.intern(raw), threshold
+
+
+@lru_cache(maxsize=4096)
+def _odds(raw: str) -> Tuple[str, float]:
+    """Intern a fractional odds string ('11/10') and convert it to decimal odds (NaN if invalid)"""
+    decimal = fractional_to_decimal(raw)
+    return sys.intern(raw), math.nan if decimal is None else decimal
+
+
+class OddsLine:
+    """One priced line for one player"""
+
+    __slots__ = ('player_name', 'stat', 'type', 'value', 'threshold', 'odds', 'decimal_odds')
+
+    def __init__(self, player_name: str, stat: Optional[str], type: str, value: str,
+                 threshold: float, odds: str, decimal_odds: float):
+        self.player_name = player_name
+        self.stat = stat
+        self.type = type
+        self.value = value
+        self.threshold = threshold
+        self.odds = odds
+        self.decimal_odds = decimal_odds
+
+    def __repr__(self) -> str:
+        return (f"OddsLine({self.player_name!r}, {self.stat!r}, {self.type!r}, "
+                f"{self.value!r}, {self.odds!r})")
+
+
+class OddsBatch:
+    """
+    Column-oriented odds for one parsed market.
+
+    Rows are stored in typed arrays (numeric thresholds and decimal odds, a
+    player index and an over/under flag) next to interned strings, instead of
+    a dict per line. `to_payload` rebuilds the parser's usual JSON shape from
+    the same string objects, so the batch can stand in for the old output.
+    """
+
+    __slots__ = ('source', 'url', 'timestamp', 'stat', 'player_names', '_player_index',
+                 'player', 'over', 'values', 'threshold', 'odds', 'decimal_odds')
+
+    def __init__(self, stat: Optional[str] = None, source: Optional[str] = None,
+                 url: Optional[str] = None, timestamp: Any = None):
+        self.source = source
+        self.url = url
+        self.timestamp = timestamp
+        self.stat = sys.intern(stat) if stat else stat
+        self.player_names: List[str] = []          # Distinct players, first-seen order
+        self._player_index: Dict[str, int] = {}
+        self.player = array('I')                   # Row -> index into player_names
+        self.over = array('B')                     # Row -> 1 for over, 0 for under
+        self.values: List[str] = []                # Row -> threshold string as sent
+        self.threshold = array('d')                # Row -> numeric threshold
+        self.odds: List[str] = []                  # Row -> fractional odds as sent
+        self.decimal_odds = array('d')             # Row -> decimal odds
+
+    def player_id(self, name: str) -> int:
+        """Index of a player, adding them (with no lines yet) on first sight"""
+        index = self._player_index.get(name)
+        if index is None:
+            index = self._player_index[name] = len(self.player_names)
+            self.player_names.append(sys.intern(name))
+        return index
+
+    def add(self, player: int, value: str, odds: str, type: str) -> None:
+        """Append a line for a player index returned by player_id()"""
+        value, threshold = _value(value)
+        odds, decimal = _odds(odds)
+        self.player.append(player)
+        self.over.append(type == OVER)
+        self.values.append(value)
+        self.threshold.append(threshold)
+        self.odds.append(odds)
+        self.decimal_odds.append(decimal)
+
+    def __len__(self) -> int:
+        return len(self.player)
+
+    def __iter__(self) -> Iterator[OddsLine]:
+        names = self.player_names
+        for row in range(len(self.player)):
+            yield OddsLine(names[self.player[row]], self.stat, OVER if self.over[row] else UNDER,
+                           self.values[row], self.threshold[row], self.odds[row], self.decimal_odds[row])
+
+    def players(self) -> List[Dict[str, Any]]:
+        """Lines grouped per player in the parser's JSON shape"""
+        entries = [{'player_name': name, 'odds': []} for name in self.player_names]
+        for row in range(len(self.player)):
+            entries[self.player[row]]['odds'].append({
+                'value': self.values[row],
+                'odds': self.odds[row],
+                'type': OVER if self.over[row] else UNDER
+            })
+        return entries
+
+    def to_payload(self) -> Dict[str, Any]:
+        """The batch as the processed_data dict Bet365Parser.process_traffic returns by default"""
+        return {
+            'source': self.source,
+            'url': self.url,
+            'timestamp': self.timestamp,
+            'stat_type': self.stat,
+            'players': self.players()
+        }
@@ -0,0 +1,77 @@
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterator
+
+
+def _decode(content: bytes) -> str:
+    return content.decode('utf-8') if content else ''
+
+
+class LazyMapping(Mapping):
+    """Read-only mapping whose values are computed on first access and then cached"""
+
+    __slots__ = ('_loaders', '_values')
+
+    def __init__(self, loaders: Dict[str, Callable[[], Any]]):
+        self._loaders = loaders
+        self._values: Dict[str, Any] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return self._values[key]
+        except KeyError:
+            pass
+        value = self._values[key] = self._loaders[key]()
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._loaders)
+
+    def __len__(self) -> int:
+        return len(self._loaders)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({list(self._loaders)})"
+
+
+class TrafficView(LazyMapping):
+    """
+    Lazy, read-only view of a captured mitmproxy flow.
+
+    Behaves like the traffic_data dict parsers have always received
+    (`view['response']['content']`, `view.get('timestamp')`, ...), but headers
+    are only copied and bodies only decoded when a parser asks for them. Each
+    value is computed at most once.
+    """
+
+    __slots__ = ('flow',)
+
+    def __init__(self, flow):
+        self.flow = flow
+        request, response = flow.request, flow.response
+        super().__init__({
+            'request': lambda: LazyMapping({
+                'url': lambda: request.url,
+                'method': lambda: request.method,
+                'headers': lambda: dict(request.headers),
+                'content': lambda: _decode(request.content),
+            }),
+            'response': lambda: LazyMapping({
+                'status_code': lambda: response.status_code,
+                'headers': lambda: dict(response.headers),
+                'content': lambda: _decode(response.content),
+            }),
+            'timestamp': lambda: flow.timestamp_start,
+        })
+
+    @property
+    def url(self) -> str:
+        return self['request']['url']
+
+    @property
+    def response_content(self) -> str:
+        return self['response']['content']
+
+    @property
+    def raw_response_content(self) -> bytes:
+        """Response body as transferred (still content-encoded), without decoding it"""
+        return self.flow.response.raw_content or b''
@@ -0,0 +1,75 @@
+"""
+Golden tests for Bet365Parser.
+
+Each fixtures/bet365/<name>.txt is a markets payload and <name>.json the
+output the parser produced for it before the tokenizing rewrite, so any
+change in parsed output shows up as a diff here.
+
+Run from cron/scraper:
+
+    python -m pytest tests
+"""
+import json
+import os
+
+import pytest
+
+from parsers.bet365 import Bet365Parser
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'bet365')
+NAMES = sorted(name[:-4] for name in os.listdir(FIXTURES) if name.endswith('.txt'))
+
+
+def _load(name):
+    with open(os.path.join(FIXTURES, name + '.txt')) as f:
+        payload = f.read().rstrip('\n')
+    with open(os.path.join(FIXTURES, name + '.json')) as f:
+        expected = json.load(f)
+    traffic = {
+        'request': {'url': expected['url']},
+        'response': {'content': payload},
+        'timestamp': expected['timestamp'],
+    }
+    return traffic, expected
+
+
+@pytest.mark.parametrize('name', NAMES)
+def test_matches_golden_output(name):
+    traffic, expected = _load(name)
+    assert Bet365Parser().process_traffic(traffic) == expected
+
+
+@pytest.mark.parametrize('name', NAMES)
+def test_compact_payload_matches_golden_output(name):
+    traffic, expected = _load(name)
+    assert Bet365Parser().process_traffic(traffic, compact=True).to_payload() == expected
+
+
+def test_repeated_fields_keep_previous_precedence():
+    traffic, _ = _load('duplicate_fields')
+    players = Bet365Parser().process_traffic(traffic)['players']
+    # Player ids and names keep their last value, column names and odds their first
+    assert [p['player_name'] for p in players] == ['Jalen Brunson', 'Josh Hart']
+    assert players[0]['odds'][0] == {'value': '20', 'odds': '4/5', 'type': 'over'}
+    assert players[1]['odds'][1] == {'value': '30', 'odds': '5/1', 'type': 'over'}
+
+
+@pytest.mark.parametrize('payload', [
+    'F;CL=18|MA;NA;LS=1|MG;NA=Game 1',
+    'LS=1|PA;NA=Jalen Brunson',
+])
+def test_malformed_stat_label_is_reported(payload):
+    traffic = {'request': {'url': ''}, 'response': {'content': payload}, 'timestamp': ''}
+    with pytest.raises(Exception, match='Error processing Bet365 traffic'):
+        Bet365Parser().process_traffic(traffic)
+
+
+def test_malformed_header_ignored_for_standard_stats():
+    # Header labels are only read for Over/Under markets, as before the rewrite
+    payload = 'MA;NA=Points;LS=1|MA;NA;LS=1|MG;NA=Game 1|PA;ID=PC1;NA=Josh Hart|CO;NA=10|PA;OD=1/2'
+    traffic = {'request': {'url': ''}, 'response': {'content': payload}, 'timestamp': ''}
+    result = Bet365Parser().process_traffic(traffic)
+    assert result['stat_type'] == 'Points'
+    assert result['players'] == [
+        {'player_name': 'Josh Hart', 'odds': [{'value': '10', 'odds': '1/2', 'type': 'over'}]}
+    ]
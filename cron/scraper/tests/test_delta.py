@@ -0,0 +1,67 @@
+"""
+Tests for SnapshotStore.
+
+Run from cron/scraper:
+
+    python -m pytest tests
+"""
+from delta import SnapshotStore
+
+URL_NBA = 'https://www.bet365.com.au/matchmarketscontentapi/markets?lid=30&pd=%23nba'
+URL_WNBA = 'https://www.bet365.com.au/matchmarketscontentapi/markets?lid=30&pd=%23wnba'
+
+
+def _market(url, odds, stat_type='Points'):
+    return {
+        'source': 'bet365',
+        'url': url,
+        'timestamp': '2024-01-01T00:00:00',
+        'stat_type': stat_type,
+        'players': [
+            {'player_name': 'Josh Hart', 'odds': [{'value': '10', 'odds': odds, 'type': 'over'}]},
+        ],
+    }
+
+
+def test_first_parse_adds_every_line():
+    delta = SnapshotStore().diff(_market(URL_NBA, '1/2'))
+    assert delta['added'] == [['Josh Hart', 'over', '10', '1/2']]
+    assert delta['changed'] == [] and delta['removed'] == []
+
+
+def test_unchanged_market_has_no_delta():
+    store = SnapshotStore()
+    store.diff(_market(URL_NBA, '1/2'))
+    assert store.diff(_market(URL_NBA, '1/2')) is None
+
+
+def test_changed_and_removed_lines():
+    store = SnapshotStore()
+    store.diff(_market(URL_NBA, '1/2'))
+    delta = store.diff(_market(URL_NBA, '4/5'))
+    assert delta['changed'] == [['Josh Hart', 'over', '10', '4/5']]
+
+    empty = dict(_market(URL_NBA, '4/5'), players=[])
+    assert store.diff(empty)['removed'] == [['Josh Hart', 'over', '10']]
+
+
+def test_urls_with_the_same_stat_are_separate_markets():
+    store = SnapshotStore()
+    store.diff(_market(URL_NBA, '1/2'))
+    # Another competition's Points market must not replace the first one's lines
+    assert store.diff(_market(URL_WNBA, '1/2'))['added'] == [['Josh Hart', 'over', '10', '1/2']]
+    assert store.diff(_market(URL_NBA, '1/2')) is None
+    assert store.diff(_market(URL_WNBA, '1/2')) is None
+    assert len(store) == 2
+
+
+def test_changes_only_hold_tracked_markets():
+    store = SnapshotStore()
+    store.diff(_market(URL_NBA, '1/2'))
+    store.track_changes()
+    store.diff(_market(URL_WNBA, '1/2'))
+
+    parent = SnapshotStore()
+    parent.merge(store.changes())
+    assert len(parent) == 1
+    assert parent.diff(_market(URL_WNBA, '1/2')) is None
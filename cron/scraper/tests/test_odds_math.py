@@ -0,0 +1,60 @@
+"""
+Tests that the scalar and array odds conversions agree, including at the
+edges (zero, one, negative zero, infinity and NaN).
+
+Run from cron/scraper:
+
+    python -m pytest tests
+"""
+import math
+
+import numpy as np
+import pytest
+
+from parsers import odds_math
+
+EDGES = [0.0, -0.0, 1.0, 2.0, 1.5, -150.0, 150.0, 0.25, math.inf, math.nan]
+
+PAIRS = [
+    (odds_math.decimal_to_american, odds_math.decimal_to_american_array),
+    (odds_math.american_to_decimal, odds_math.american_to_decimal_array),
+    (odds_math.decimal_to_implied, odds_math.decimal_to_implied_array),
+    (odds_math.implied_to_decimal, odds_math.implied_to_decimal_array),
+]
+
+
+@pytest.mark.parametrize('scalar, array', PAIRS, ids=[scalar.__name__ for scalar, _ in PAIRS])
+def test_scalar_matches_array(scalar, array):
+    expected = array(EDGES)
+    for value, want in zip(EDGES, expected):
+        got = scalar(value)
+        if math.isnan(want):
+            assert math.isnan(got), value
+        else:
+            assert got == want, value
+
+
+def test_zero_is_infinite_not_an_error():
+    assert odds_math.decimal_to_implied(0) == math.inf
+    assert odds_math.implied_to_decimal(0) == math.inf
+    assert odds_math.implied_to_decimal(-0.0) == -math.inf
+    assert odds_math.decimal_to_implied(math.inf) == 0
+
+
+def test_prices_that_pay_nothing_are_nan():
+    assert math.isnan(odds_math.decimal_to_american(1))
+    assert math.isnan(odds_math.american_to_decimal(0))
+
+
+@pytest.mark.parametrize('fractional, decimal', [
+    ('11/10', 2.1), ('1/2', 1.5), ('0/1', 1.0), ('1/0', None), ('', None), ('evens', None),
+])
+def test_fractional_to_decimal(fractional, decimal):
+    assert odds_math.fractional_to_decimal(fractional) == decimal
+
+
+def test_fractional_array_marks_invalid_as_nan():
+    result = odds_math.fractional_to_decimal_array(['11/10', '1/0', None])
+    assert result[0] == 2.1
+    assert np.isnan(result[1:]).all()
+    assert odds_math.fractional_to_decimal_array([]).shape == (0,)
@@ -0,0 +1,560 @@
+"""
+SQLite storage for the payload models in cron/models.py.
+
+Declares a table for every model, with foreign keys and the indexes its
+lookups need, opens connections with WAL and tuned pragmas, and loads
+batches of payloads with one executemany per transaction. The ingest server
+writes through it, and seed and odds files can be loaded directly from the
+repository root:
+
+    python -m cron.storage --db cron/ballknower.db \\
+        --teams teams_seed.json --players players_seed.json --odds odds.ndjson
+
+Every odds write also upserts the newest line per player, stat, book, bet
+type and threshold into odds_latest in the same transaction; latest_odds()
+reads the current board from it.
+
+Files are streamed with cron/scraper/jsonstream.py, so JSON arrays, NDJSON
+and their .gz forms all work. Foreign keys are declared but not enforced
+unless connect(foreign_keys=True) is used, matching how the ingest server
+has always accepted odds for games it has not seen yet.
+"""
+import argparse
+import datetime
+import os
+import sqlite3
+import time
+from itertools import islice
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Type
+
+from pydantic import BaseModel
+
+from cron.models import (
+    BookPayload,
+    TeamPayload,
+    PlayerPayload,
+    GamePayload,
+    PlayerStatPayload,
+    OddsPayload,
+    PredictionPayload,
+    BetPickPayload,
+    InjuryReportPayload,
+    ScrapeLogPayload,
+    UserAccountPayload,
+    validate_batch,
+)
+from cron.scraper.jsonstream import iter_records
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ballknower.db")
+LOAD_BATCH_SIZE = 50000  # Records validated and inserted at a time when loading files
+
+# Resource name (URL path segment and table name) -> payload model
+RESOURCES: Dict[str, Type[BaseModel]] = {
+    "books": BookPayload,
+    "teams": TeamPayload,
+    "players": PlayerPayload,
+    "games": GamePayload,
+    "player_stats": PlayerStatPayload,
+    "odds": OddsPayload,
+    "predictions": PredictionPayload,
+    "bet_picks": BetPickPayload,
+    "injury_reports": InjuryReportPayload,
+    "scrape_logs": ScrapeLogPayload,
+    "user_accounts": UserAccountPayload,
+}
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",    # WAL stays consistent; only the last commits can be lost on power failure
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",     # 64 MiB page cache
+    "PRAGMA mmap_size=268435456",   # Read through up to 256 MiB of memory-mapped pages
+)
+
+# Column types follow the models: int -> INTEGER, float -> REAL, anything
+# else (str, datetime, HttpUrl) -> TEXT, with datetimes in ISO format.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS books (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    website TEXT
+);
+CREATE INDEX IF NOT EXISTS books_name ON books (name);
+
+CREATE TABLE IF NOT EXISTS teams (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    abbreviation TEXT,
+    city TEXT,
+    conference TEXT,
+    division TEXT
+);
+CREATE INDEX IF NOT EXISTS teams_name ON teams (name);
+
+CREATE TABLE IF NOT EXISTS players (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    team_id INTEGER NOT NULL REFERENCES teams (id),
+    position TEXT,
+    details TEXT
+);
+CREATE INDEX IF NOT EXISTS players_team_id ON players (team_id);
+CREATE INDEX IF NOT EXISTS players_name ON players (name);
+
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    game_date TEXT NOT NULL,
+    home_team_id INTEGER NOT NULL REFERENCES teams (id),
+    away_team_id INTEGER NOT NULL REFERENCES teams (id),
+    venue TEXT,
+    status TEXT
+);
+CREATE INDEX IF NOT EXISTS games_game_date ON games (game_date);
+CREATE INDEX IF NOT EXISTS games_home_team_id ON games (home_team_id);
+CREATE INDEX IF NOT EXISTS games_away_team_id ON games (away_team_id);
+
+CREATE TABLE IF NOT EXISTS player_stats (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    game_id INTEGER NOT NULL REFERENCES games (id),
+    player_id INTEGER NOT NULL REFERENCES players (id),
+    stat_type TEXT NOT NULL,
+    value REAL NOT NULL,
+    minutes_played REAL,
+    additional_info TEXT
+);
+CREATE INDEX IF NOT EXISTS player_stats_game_id ON player_stats (game_id);
+CREATE INDEX IF NOT EXISTS player_stats_player_id ON player_stats (player_id, stat_type);
+
+CREATE TABLE IF NOT EXISTS odds (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    game_id INTEGER NOT NULL REFERENCES games (id),
+    player_id INTEGER REFERENCES players (id),
+    book_id INTEGER NOT NULL REFERENCES books (id),
+    bet_type TEXT NOT NULL,
+    stat TEXT,
+    threshold REAL,
+    odds_value REAL NOT NULL,
+    timestamp TEXT,
+    additional_details TEXT
+);
+CREATE INDEX IF NOT EXISTS odds_game_id ON odds (game_id);
+CREATE INDEX IF NOT EXISTS odds_player_id ON odds (player_id, stat, timestamp);
+CREATE INDEX IF NOT EXISTS odds_book_id ON odds (book_id, timestamp);
+
+-- Newest odds per player, stat, book, bet type and threshold, kept up to date
+-- by every odds write so the current board never has to be derived from the
+-- history. Each alternate line of a ladder (20.5, 25.5, 30.5) is its own row.
+CREATE TABLE IF NOT EXISTS odds_latest (
+    player_id INTEGER NOT NULL,     -- 0 for team-level odds
+    stat TEXT NOT NULL,             -- '' for odds without a stat
+    book_id INTEGER NOT NULL,
+    bet_type TEXT NOT NULL,
+    has_threshold INTEGER NOT NULL, -- 0 for odds without a threshold
+    threshold REAL NOT NULL,        -- 0 when has_threshold is 0
+    game_id INTEGER NOT NULL,
+    odds_value REAL NOT NULL,
+    timestamp TEXT,
+    timestamp_us INTEGER NOT NULL,  -- timestamp as UTC epoch microseconds, for ordering
+    additional_details TEXT,
+    PRIMARY KEY (player_id, stat, book_id, bet_type, has_threshold, threshold)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS odds_latest_stat ON odds_latest (stat, book_id);
+CREATE INDEX IF NOT EXISTS odds_latest_book_id ON odds_latest (book_id);
+CREATE INDEX IF NOT EXISTS odds_latest_game_id ON odds_latest (game_id);
+
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    game_id INTEGER NOT NULL REFERENCES games (id),
+    player_id INTEGER NOT NULL REFERENCES players (id),
+    stat TEXT NOT NULL,
+    predicted_value REAL NOT NULL,
+    variance REAL,
+    model_used TEXT,
+    confidence REAL NOT NULL,
+    timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS predictions_game_id ON predictions (game_id);
+CREATE INDEX IF NOT EXISTS predictions_player_id ON predictions (player_id, stat);
+
+CREATE TABLE IF NOT EXISTS bet_picks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    game_id INTEGER NOT NULL REFERENCES games (id),
+    player_id INTEGER NOT NULL REFERENCES players (id),
+    bet_type TEXT NOT NULL,
+    suggestion TEXT NOT NULL,
+    recommended_amount REAL,
+    expected_return REAL,
+    predicted_value REAL NOT NULL,
+    odds_value REAL NOT NULL,
+    timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS bet_picks_game_id ON bet_picks (game_id);
+CREATE INDEX IF NOT EXISTS bet_picks_player_id ON bet_picks (player_id);
+
+CREATE TABLE IF NOT EXISTS injury_reports (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    player_id INTEGER NOT NULL REFERENCES players (id),
+    report TEXT NOT NULL,
+    article_url TEXT,
+    summary TEXT NOT NULL,
+    expected_impact TEXT,
+    timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS injury_reports_player_id ON injury_reports (player_id, timestamp);
+
+CREATE TABLE IF NOT EXISTS scrape_logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source TEXT NOT NULL,
+    url TEXT,
+    scrape_time TEXT,
+    status TEXT,
+    error_message TEXT
+);
+CREATE INDEX IF NOT EXISTS scrape_logs_source ON scrape_logs (source, scrape_time);
+
+CREATE TABLE IF NOT EXISTS user_accounts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL,
+    email TEXT NOT NULL,
+    hashed_password TEXT NOT NULL,
+    created_at TEXT,
+    account_type TEXT,
+    linked_accounts TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS user_accounts_username ON user_accounts (username);
+CREATE UNIQUE INDEX IF NOT EXISTS user_accounts_email ON user_accounts (email);
+"""
+
+
+def _fields(model: Type[BaseModel]) -> Dict[str, Any]:
+    # pydantic v2 exposes model_fields; v1 only has __fields__
+    return getattr(model, "model_fields", None) or model.__fields__
+
+
+def columns(resource: str, with_id: bool = False) -> List[str]:
+    """Column names of a resource's table, in model field order"""
+    return [name for name in _fields(RESOURCES[resource]) if with_id or name != "id"]
+
+
+def _to_sql(value: Any) -> Any:
+    if value is None or isinstance(value, (int, float, str)):
+        return value
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return str(value)  # HttpUrl and other string-like types
+
+
+def _needs_conversion(field: Any) -> bool:
+    # Anything but int, float, str and None (datetimes, URLs) is converted by _to_sql
+    annotation = getattr(field, "annotation", None) or getattr(field, "outer_type_", None)
+    args = getattr(annotation, "__args__", ()) or (annotation,)
+    return any(arg not in (int, float, str, type(None)) for arg in args)
+
+
+def _row_getter(resource: str, with_id: bool) -> Callable[[BaseModel], Tuple[Any, ...]]:
+    """Reads a model's column values as a tuple, converting only the fields that need it"""
+    names = columns(resource, with_id)
+    get = attrgetter(*names)
+    fields = _fields(RESOURCES[resource])
+    convert = [i for i, name in enumerate(names) if _needs_conversion(fields[name])]
+    if not convert:
+        return get
+
+    def row(item: BaseModel) -> Tuple[Any, ...]:
+        values = list(get(item))
+        for i in convert:
+            values[i] = _to_sql(values[i])
+        return tuple(values)
+    return row
+
+
+def _default(field: Any) -> Tuple[Any, Optional[Callable[[], Any]]]:
+    """A field's default value and default factory; required fields default to None"""
+    required = field.is_required() if hasattr(field, "is_required") else field.required
+    return (None if required else field.default), getattr(field, "default_factory", None)
+
+
+def _record_getter(resource: str, with_id: bool) -> Callable[[Dict[str, Any]], List[Any]]:
+    """
+    Reads column values straight from a payload dict, skipping validation.
+
+    Missing fields get the model's defaults, as validation would give them,
+    and values are converted like a model's (datetimes to ISO format).
+    """
+    names = columns(resource, with_id)
+    fields = _fields(RESOURCES[resource])
+    defaults = [_default(fields[name]) for name in names]
+    values_if_missing = [default for default, _ in defaults]
+    factories = [(i, names[i], factory) for i, (_, factory) in enumerate(defaults) if factory is not None]
+    convert = [i for i, name in enumerate(names) if _needs_conversion(fields[name])]
+
+    def row(record: Dict[str, Any]) -> List[Any]:
+        values = list(map(record.get, names, values_if_missing))
+        for i, name, factory in factories:
+            if name not in record:
+                values[i] = factory()
+        for i in convert:
+            values[i] = _to_sql(values[i])
+        return values
+    return row
+
+
+def _insert_sql(resource: str, with_id: bool) -> str:
+    names = columns(resource, with_id)
+    sql = f"INSERT INTO {resource} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})"
+    if with_id:
+        # Records that bring their own id replace the stored row, so reloading a seed file is idempotent
+        updates = ", ".join(f"{name} = excluded.{name}" for name in names if name != "id")
+        sql += f" ON CONFLICT(id) DO UPDATE SET {updates}"
+    return sql
+
+
+def connect(path: str = DEFAULT_DB_PATH, foreign_keys: bool = False) -> sqlite3.Connection:
+    """Open a database with the storage pragmas applied; rows come back as sqlite3.Row"""
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    if foreign_keys:
+        conn.execute("PRAGMA foreign_keys=ON")
+    return conn
+
+
+LATEST_KEY = ("player_id", "stat", "book_id", "bet_type", "has_threshold", "threshold")
+LATEST_VALUES = ("game_id", "odds_value", "timestamp", "timestamp_us", "additional_details")
+
+# A stored row is only replaced by one at least as new, so batches may arrive out of order
+LATEST_UPSERT = (
+    f"INSERT INTO odds_latest ({', '.join(LATEST_KEY + LATEST_VALUES)}) "
+    f"VALUES ({', '.join('?' * (len(LATEST_KEY) + len(LATEST_VALUES)))}) "
+    f"ON CONFLICT({', '.join(LATEST_KEY)}) DO UPDATE SET "
+    f"{', '.join(f'{name} = excluded.{name}' for name in LATEST_VALUES)} "
+    "WHERE excluded.timestamp_us >= odds_latest.timestamp_us"
+)
+
+EPOCH = datetime.datetime(1970, 1, 1)
+OLDEST_US = -(2 ** 63)  # Ordering value of odds without a readable timestamp
+
+
+def _epoch_us(timestamp: Any) -> int:
+    """
+    A stored timestamp as UTC epoch microseconds. ISO strings are parsed, so
+    '2024-01-01 00:00:00', naive (UTC) and offset-aware values order by the
+    instant they name; a missing or unreadable timestamp orders first.
+    """
+    if isinstance(timestamp, str):
+        try:
+            timestamp = datetime.datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+        except ValueError:
+            return OLDEST_US
+    if not isinstance(timestamp, datetime.datetime):
+        return OLDEST_US
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return (timestamp - EPOCH) // datetime.timedelta(microseconds=1)
+
+
+def init_db(conn: sqlite3.Connection) -> None:
+    """Create every table and index that does not exist yet"""
+    with conn:
+        # Older odds_latest tables kept one line per ladder or ordered rows by
+        # their timestamp strings; drop them so they are recreated and rebuilt below
+        names = [row[1] for row in conn.execute("PRAGMA table_info(odds_latest)")]
+        if names and not {"has_threshold", "timestamp_us"} <= set(names):
+            conn.execute("DROP TABLE odds_latest")
+        conn.executescript(SCHEMA)
+        # Databases that already hold odds get their odds_latest filled once
+        if conn.execute("SELECT NOT EXISTS (SELECT 1 FROM odds_latest) AND EXISTS (SELECT 1 FROM odds)").fetchone()[0]:
+            rebuild_latest(conn)
+
+
+def rebuild_latest(conn: sqlite3.Connection, batch_size: int = LOAD_BATCH_SIZE) -> None:
+    """Recompute odds_latest from the whole odds table, oldest row first"""
+    names = columns("odds")
+    with conn:
+        conn.execute("DELETE FROM odds_latest")
+        cursor = conn.execute(f"SELECT {', '.join(names)} FROM odds ORDER BY id")
+        # Timestamps are parsed in Python, as for every write, so both order lines the same way
+        for rows in iter(lambda: cursor.fetchmany(batch_size), []):
+            _update_latest(conn, names, rows)
+
+
+def _update_latest(conn: sqlite3.Connection, names: List[str], rows: List[Sequence[Any]]) -> None:
+    """Upsert the newest of a batch of odds rows (in column order `names`) into odds_latest"""
+    player, stat, book, bet_type, threshold, game, odds_value, timestamp, details = (
+        names.index(name) for name in
+        ("player_id", "stat", "book_id", "bet_type", "threshold",
+         "game_id", "odds_value", "timestamp", "additional_details")
+    )
+    newest: Dict[Tuple[Any, ...], Tuple[int, Sequence[Any]]] = {}
+    for row in rows:
+        line = row[threshold]
+        # SQLite stores NaN as NULL, so it counts as no threshold like None does
+        has_threshold = line is not None and line == line
+        key = (row[player] or 0, row[stat] or "", row[book], row[bet_type],
+               int(has_threshold), line if has_threshold else 0.0)
+        us = _epoch_us(row[timestamp])
+        current = newest.get(key)
+        if current is None or us >= current[0]:
+            newest[key] = (us, row)
+    conn.executemany(LATEST_UPSERT, [
+        (*key, row[game], row[odds_value], row[timestamp], us, row[details])
+        for key, (us, row) in newest.items()
+    ])
+
+
+def _write(conn: sqlite3.Connection, resource: str, keep_ids: bool, rows: Iterable[Sequence[Any]]) -> int:
+    """Insert rows inside the caller's transaction, keeping odds_latest in step with odds"""
+    if resource != "odds":
+        return conn.executemany(_insert_sql(resource, keep_ids), rows).rowcount
+    rows = list(rows)
+    written = conn.executemany(_insert_sql(resource, keep_ids), rows).rowcount
+    _update_latest(conn, columns(resource, keep_ids), rows)
+    return written
+
+
+def latest_odds(conn: sqlite3.Connection, book_id: Optional[int] = None, stat: Optional[str] = None,
+                player_id: Optional[int] = None, game_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    The current odds board from odds_latest: the newest line per player,
+    stat, book, bet type and threshold, optionally filtered.
+
+    Every filter combination is answered from the primary key or an index,
+    so the cost follows the number of rows returned, not the odds history.
+
+    Returns:
+        List[Dict[str, Any]]: Rows with the odds table's columns (no id);
+            player_id, stat and threshold are None for team-level, stat-less
+            and threshold-less odds
+    """
+    where, params = [], []
+    for name, value in (("player_id", player_id), ("stat", stat), ("book_id", book_id), ("game_id", game_id)):
+        if value is not None:
+            where.append(f"{name} = ?")
+            params.append(value)
+    names = ("player_id", "stat", "book_id", "bet_type", "has_threshold", "threshold",
+             "game_id", "odds_value", "timestamp", "additional_details")
+    sql = f"SELECT {', '.join(names)} FROM odds_latest"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    rows = []
+    for row in conn.execute(sql + " ORDER BY player_id, stat, book_id, bet_type, has_threshold, threshold", params):
+        row = dict(zip(names, row))
+        row["player_id"] = row["player_id"] or None
+        row["stat"] = row["stat"] or None
+        if not row.pop("has_threshold"):
+            row["threshold"] = None
+        rows.append(row)
+    return rows
+
+
+def insert_many(conn: sqlite3.Connection, resource: str, items: Iterable[BaseModel],
+                keep_ids: bool = False) -> int:
+    """
+    Write validated payloads in a single transaction. Odds also update
+    odds_latest in that transaction.
+
+    Args:
+        conn (sqlite3.Connection): Connection from connect()
+        resource (str): Table name, a key of RESOURCES
+        items (Iterable[BaseModel]): Payloads of the resource's model
+        keep_ids (bool): Store the payloads' own ids (replacing rows with the
+            same id) instead of letting SQLite assign them
+
+    Returns:
+        int: Number of rows written
+    """
+    row = _row_getter(resource, keep_ids)
+    with conn:
+        return _write(conn, resource, keep_ids, map(row, items))
+
+
+def _secondary_indexes(conn: sqlite3.Connection, table: str) -> List[Tuple[str, str]]:
+    """Names and CREATE statements of a table's declared indexes (not its primary key)"""
+    return conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL", (table,)
+    ).fetchall()
+
+
+def load_records(conn: sqlite3.Connection, resource: str, records: Iterable[Dict[str, Any]],
+                 keep_ids: bool = True, validate: bool = True, batch_size: int = LOAD_BATCH_SIZE) -> int:
+    """
+    Write payload dicts a batch at a time, all in one transaction.
+
+    Nothing is written if any batch fails validation (pydantic's
+    ValidationError is raised). When the table starts out empty its indexes
+    are dropped for the load and rebuilt at the end, which is cheaper than
+    updating them row by row; the drop is part of the transaction, so a
+    failed load leaves them in place.
+
+    Args:
+        conn (sqlite3.Connection): Connection from connect()
+        resource (str): Table name, a key of RESOURCES
+        records (Iterable[Dict[str, Any]]): Payload dicts
+        keep_ids (bool): Store the records' own ids, see insert_many
+        validate (bool): Validate with the resource's model. Pass False only
+            for files this codebase wrote itself, such as the seed files; the
+            rows are then stored as given, with the model's defaults filled in.
+        batch_size (int): Records validated and inserted at a time
+
+    Returns:
+        int: Number of rows written
+    """
+    model = RESOURCES[resource]
+    row = _row_getter(resource, keep_ids) if validate else _record_getter(resource, keep_ids)
+    records = iter(records)
+    written = 0
+    with conn:
+        # sqlite3 opens no transaction for DDL, so begin one explicitly; otherwise
+        # DROP INDEX commits at once and a failed load leaves the table unindexed
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")
+        indexes = []
+        if conn.execute(f"SELECT NOT EXISTS (SELECT 1 FROM {resource})").fetchone()[0]:
+            indexes = _secondary_indexes(conn, resource)
+            for name, _ in indexes:
+                conn.execute(f"DROP INDEX {name}")
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                break
+            if validate:
+                batch = validate_batch(model, batch)
+            written += _write(conn, resource, keep_ids, map(row, batch))
+        for _, create in indexes:
+            conn.execute(create)
+    return written
+
+
+def load_file(conn: sqlite3.Connection, resource: str, path: str, keep_ids: bool = True,
+              validate: bool = True) -> int:
+    """Load a JSON, NDJSON or gzipped record file such as teams_seed.json"""
+    return load_records(conn, resource, iter_records(path), keep_ids, validate)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create the SQLite schema and bulk-load payload files.")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="SQLite database path (default: cron/ballknower.db)")
+    parser.add_argument("--teams", help="Teams file (e.g. teams_seed.json)")
+    parser.add_argument("--players", help="Players file (e.g. players_seed.json)")
+    parser.add_argument("--odds", help="Odds file of OddsPayload records")
+    parser.add_argument("--trusted", action="store_true",
+                        help="Skip validation, for files written by players.py or this repository's tools")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    init_db(conn)
+    # Teams first, so players' team_ids point at stored rows
+    for resource, path in (("teams", args.teams), ("players", args.players), ("odds", args.odds)):
+        if not path:
+            continue
+        start = time.perf_counter()
+        count = load_file(conn, resource, path, validate=not args.trusted)
+        elapsed = time.perf_counter() - start
+        print(f"Loaded {count} {resource} from {path} in {elapsed:.2f}s ({count / max(elapsed, 1e-9):,.0f} rows/s)")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
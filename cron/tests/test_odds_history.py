@@ -0,0 +1,112 @@
+"""
+Tests for OddsHistory.
+
+Run from the repository root:
+
+    python -m pytest cron/tests
+"""
+import datetime
+import json
+import logging
+import threading
+import urllib.request
+
+import pytest
+
+from cron import ingest_server
+from cron.models import OddsPayload, dump_batch_json
+from cron.odds_history import OddsHistory
+
+LADDER = (20.5, 25.5, 30.5)
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = OddsHistory(str(tmp_path / "history.db"))
+    yield history
+    history.close()
+
+
+def _odds(timestamp, threshold, odds_value, player_id=7, book_id=1, stat="Points"):
+    return OddsPayload(game_id=1, player_id=player_id, book_id=book_id, bet_type="O/U", stat=stat,
+                       threshold=threshold, odds_value=odds_value, timestamp=timestamp)
+
+
+def _ladder(timestamp, odds_value, player_id=7):
+    return [_odds(timestamp, threshold, odds_value, player_id) for threshold in LADDER]
+
+
+def test_partial_ladder_update_keeps_the_other_lines(history):
+    polled = datetime.datetime.utcnow().replace(microsecond=0) - datetime.timedelta(hours=1)
+    history.append(_ladder(polled, 1.9) + _ladder(polled, 1.9, player_id=8))
+    # Only the 20.5 line moves in the next poll
+    history.append([_odds(polled + datetime.timedelta(minutes=1), 20.5, 2.1)])
+
+    board = history.board(book_id=1)
+    assert len(board) == 6
+    lines = {(row.player_id, row.threshold): row.odds_value for row in board}
+    assert lines[(7, 20.5)] == 2.1
+    assert lines[(7, 25.5)] == lines[(7, 30.5)] == 1.9
+    assert sorted(row.threshold for row in history.latest(7, "Points", book_id=1)) == list(LADDER)
+
+
+def test_latest_ignores_lines_older_than_the_lookback(history):
+    now = datetime.datetime.utcnow()
+    history.append([_odds(now - datetime.timedelta(days=10), 20.5, 1.9),
+                    _odds(now - datetime.timedelta(minutes=5), 25.5, 1.8)])
+    assert [row.threshold for row in history.latest(7, "Points", lookback_days=7)] == [25.5]
+    assert len(history.latest(7, "Points", lookback_days=30)) == 2
+
+
+def test_samples_are_stored_in_day_partitions(history):
+    day = datetime.datetime(2024, 3, 1, 23, 59)
+    history.append([_odds(day, 20.5, 1.9), _odds(day + datetime.timedelta(minutes=2), 20.5, 2.0)])
+    # A repeat of a stored sample is skipped
+    assert history.append([_odds(day, 20.5, 1.9)]) == 0
+
+    assert [(p["day"], p["rows"]) for p in history.partitions()] == [("20240301", 1), ("20240302", 1)]
+    samples = history.history(7, "Points", start=day, end=day + datetime.timedelta(minutes=1))
+    assert [row.odds_value for row in samples] == [1.9]
+    assert [row.odds_value for row in history.history(7, "Points")] == [1.9, 2.0]
+
+
+def test_compact_keeps_the_ends_of_unchanged_runs(history):
+    start = datetime.datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - datetime.timedelta(days=5)
+    odds = [1.9, 1.9, 1.9, 2.0, 2.0, 2.0, 1.9]
+    history.append([_odds(start + datetime.timedelta(minutes=n), 20.5, value) for n, value in enumerate(odds)])
+    recent = datetime.datetime.utcnow() - datetime.timedelta(minutes=5)
+    history.append([_odds(recent, 20.5, 1.9), _odds(recent + datetime.timedelta(seconds=1), 20.5, 1.9),
+                    _odds(recent + datetime.timedelta(seconds=2), 20.5, 1.9)])
+
+    assert history.compact(older_than_days=2) == 2
+    kept = history.history(7, "Points", end=start + datetime.timedelta(days=1))
+    assert [row.odds_value for row in kept] == [1.9, 1.9, 2.0, 2.0, 1.9]
+    compacted = {p["day"]: p for p in history.partitions()}[start.strftime("%Y%m%d")]
+    assert compacted["rows"] == 5 and compacted["compacted_at"] is not None
+    # Days inside the window and days already compacted are left alone
+    assert history.compact(older_than_days=2) == 0
+    assert len(history.history(7, "Points", start=recent)) == 3
+
+
+def test_ingest_replies_when_the_history_append_fails(tmp_path, monkeypatch, caplog):
+    server = ingest_server.serve("127.0.0.1", 0, str(tmp_path / "ballknower.db"), str(tmp_path / "history.db"))
+    history = server.RequestHandlerClass.history
+
+    def fail(items):
+        raise RuntimeError("disk full")
+    monkeypatch.setattr(history, "append", fail)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        body = dump_batch_json([_odds("2024-01-01T10:00:00", 20.5, 1.9)]).encode()
+        request = urllib.request.Request(f"http://127.0.0.1:{server.server_port}/odds/bulk_insert", data=body,
+                                         headers={"Content-Type": "application/json"})
+        with caplog.at_level(logging.ERROR, logger=ingest_server.logger.name):
+            with urllib.request.urlopen(request, timeout=10) as response:
+                assert response.status == 200
+                assert json.load(response) == {"inserted": 1}
+    finally:
+        server.shutdown()
+        server.server_close()
+        history.close()
+    assert "Failed to append 1 odds to the history: disk full" in caplog.text
@@ -0,0 +1,96 @@
+"""
+Tests for loading odds and keeping odds_latest current.
+
+Run from the repository root:
+
+    python -m pytest cron/tests
+"""
+import pytest
+from pydantic import ValidationError
+
+from cron import storage
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = storage.connect(str(tmp_path / "ballknower.db"))
+    storage.init_db(conn)
+    yield conn
+    conn.close()
+
+
+def _odds(timestamp, threshold, odds_value, player_id=7, book_id=1, stat="Points"):
+    return {"game_id": 1, "player_id": player_id, "book_id": book_id, "bet_type": "O/U", "stat": stat,
+            "threshold": threshold, "odds_value": odds_value, "timestamp": timestamp}
+
+
+def _board(conn, **filters):
+    return {(row["player_id"], row["threshold"]): row["odds_value"]
+            for row in storage.latest_odds(conn, **filters)}
+
+
+def _index_names(conn, table):
+    return sorted(name for name, _ in storage._secondary_indexes(conn, table))
+
+
+def test_out_of_order_batches_keep_the_newest_line(conn):
+    storage.load_records(conn, "odds", [_odds("2024-01-01T10:05:00", 20.5, 2.1)], keep_ids=False)
+    storage.load_records(conn, "odds", [_odds("2024-01-01T10:00:00", 20.5, 1.9)], keep_ids=False)
+    assert _board(conn) == {(7, 20.5): 2.1}
+    assert conn.execute("SELECT COUNT(*) FROM odds").fetchone()[0] == 2
+
+
+def test_newest_line_within_a_batch_wins(conn):
+    storage.load_records(conn, "odds", [
+        _odds("2024-01-01T10:05:00", 20.5, 2.1),
+        _odds("2024-01-01T10:00:00", 20.5, 1.9),
+    ], keep_ids=False)
+    assert _board(conn) == {(7, 20.5): 2.1}
+
+
+def test_timestamps_order_by_instant_not_text(conn):
+    # 12:00+02:00 is 10:00 UTC, before the naive (UTC) 11:00 the trusted path stores as given
+    storage.load_records(conn, "odds", [_odds("2024-01-01 11:00:00", 20.5, 2.0)], keep_ids=False, validate=False)
+    storage.load_records(conn, "odds", [_odds("2024-01-01T12:00:00+02:00", 20.5, 1.9)], keep_ids=False)
+    assert _board(conn) == {(7, 20.5): 2.0}
+
+
+def test_ladder_lines_coexist(conn):
+    storage.load_records(conn, "odds", [
+        _odds("2024-01-01T10:00:00", threshold, 1.9) for threshold in (20.5, 25.5, 30.5)
+    ] + [_odds("2024-01-01T10:00:00", None, 1.5)], keep_ids=False)
+    # Re-posting only one line of the ladder leaves the others current
+    storage.load_records(conn, "odds", [_odds("2024-01-01T10:01:00", 25.5, 2.2)], keep_ids=False)
+    assert _board(conn, book_id=1, stat="Points") == {
+        (7, None): 1.5, (7, 20.5): 1.9, (7, 25.5): 2.2, (7, 30.5): 1.9,
+    }
+
+
+def test_rebuild_matches_incremental_updates(conn):
+    storage.load_records(conn, "odds", [
+        _odds("2024-01-01T10:00:00", 20.5, 1.9),
+        _odds("2024-01-01T10:00:00+00:00", 20.5, 2.0),  # Same instant: the later row wins
+        _odds("2024-01-01T09:00:00", float("nan"), 1.4),
+        _odds(None, None, 1.3, player_id=None),
+    ], keep_ids=False, validate=False)
+    before = storage.latest_odds(conn)
+    storage.rebuild_latest(conn)
+    assert storage.latest_odds(conn) == before
+    assert _board(conn)[(7, 20.5)] == 2.0
+
+
+def test_failed_load_keeps_the_dropped_indexes(conn):
+    indexes = _index_names(conn, "odds")
+    assert indexes
+    records = [_odds("2024-01-01T10:00:00", 20.5, 1.9), _odds("2024-01-01T10:00:00", 20.5, "not odds")]
+    with pytest.raises(ValidationError):
+        storage.load_records(conn, "odds", records, keep_ids=False, batch_size=1)
+    assert _index_names(conn, "odds") == indexes
+    assert conn.execute("SELECT COUNT(*) FROM odds").fetchone()[0] == 0
+    assert storage.latest_odds(conn) == []
+
+
+def test_successful_load_rebuilds_the_indexes(conn):
+    indexes = _index_names(conn, "odds")
+    storage.load_records(conn, "odds", [_odds("2024-01-01T10:00:00", 20.5, 1.9)], keep_ids=False)
+    assert _index_names(conn, "odds") == indexes
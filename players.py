@@ -1,15 +1,67 @@
 import requests
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict, Iterable, Iterator
+import argparse
+import asyncio
+import functools
+import itertools
 import json
 import sys
 import os
-from cron.models import PlayerPayload, TeamPayload
+import threading
+from cron.http_cache import HttpCache
+from cron.scraper.http_client import get_client
+from cron.scraper.jsonstream import output_path, write_records
+from cron.models import PlayerPayload, TeamPayload, dump_batch, validate_batch
 
 # Add the parent directory to the Python path so we can import from cron/
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 
+# Requests in flight at once per source
+NBA_CONCURRENCY = int(os.getenv("NBA_CONCURRENCY", "4"))
+GLEAGUE_CONCURRENCY = int(os.getenv("GLEAGUE_CONCURRENCY", "5"))
+
+NBA_PLAYERS_URL = "https://www.balldontlie.io/api/v1/players"
+NBA_PER_PAGE = 100  # Maximum items per page available on the API.
+GLEAGUE_PLAYERS_URL = "https://www.thesportsdb.com/api/v1/json/1/searchplayers.php"
+SEED_CHUNK = 1000  # Players validated and dumped to dicts at a time when writing the seed file
+
+# Representative list of NBA G-League team names.
+GLEAGUE_TEAM_NAMES = [
+    "Austin Spurs",
+    "Long Island Nets",
+    "Raptors 905",
+    "Grand Rapids Drive",
+    "Lakeland Magic",
+    "Salt Lake City Stars",
+    "South Bay Lakers",
+    "Maine Red Claws",
+    "Fort Wayne Mad Ants",
+    "Capitanes de Ciudad de México",
+    "Westchester Knicks",
+    "Wisconsin Herd",
+    "College Park Skyhawks",
+    "Delaware Blue Coats",
+    "Sioux Falls Skyforce"
+]
+
+# On-disk response cache shared by both sources (see cron/http_cache.py)
+_http_cache: Optional[HttpCache] = None
+_http_cache_loaded = False
+_http_cache_lock = threading.Lock()
+
+def http_get(url: str, params: Optional[dict] = None) -> requests.Response:
+    """GET through the response cache, so repeat runs barely touch the APIs"""
+    global _http_cache, _http_cache_loaded
+    with _http_cache_lock:
+        if not _http_cache_loaded:
+            _http_cache = HttpCache.from_env()
+            _http_cache_loaded = True
+    if _http_cache is None:
+        return get_client().get(url, params=params)
+    return _http_cache.get(url, params)
+
 # Dictionary to store team IDs
 team_cache = {}
 next_team_id = 1
@@ -28,158 +80,213 @@ def get_or_create_team_id(team_name: str, team_info: dict = None) -> int:
     
     return team_id
 
+async def _get(url: str, semaphore: asyncio.Semaphore, params: Optional[dict] = None) -> requests.Response:
+    """http_get in a worker thread, under the source's concurrency limit"""
+    async with semaphore:
+        # run_in_executor rather than asyncio.to_thread, which needs Python 3.9
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(http_get, url, params))
+
+def _chunks(items: Iterable, size: int = SEED_CHUNK) -> Iterator[list]:
+    """Consecutive lists of up to `size` items"""
+    iterator = iter(items)
+    return iter(lambda: list(itertools.islice(iterator, size)), [])
+
+def _validated(payloads: Iterable[dict], source: str) -> Iterator[PlayerPayload]:
+    """Validate payload dicts a chunk at a time as they are consumed, then report the count"""
+    count = 0
+    for chunk in _chunks(payloads):
+        count += len(chunk)
+        # Validate each chunk in one call rather than one model at a time
+        yield from validate_batch(PlayerPayload, chunk)
+    print(f"Fetched {count} {source} players")
+
 # ---------------------------
 # Function to Fetch NBA Players from balldontlie API
 # ---------------------------
-def fetch_nba_players() -> List[PlayerPayload]:
+async def fetch_nba_pages(concurrency: int = NBA_CONCURRENCY) -> List[Dict]:
     """
-    Uses the free balldontlie API to fetch all NBA players.
-    This API provides paginated results.
+    Uses the free balldontlie API to fetch every page of NBA players.
+    The first page reports the page count; the rest are fetched concurrently.
+
+    Returns:
+        List[Dict]: Raw player records in page order. Pages after one that
+            failed are dropped, as the serial walk used to stop there.
     """
-    players: List[PlayerPayload] = []
-    page = 1
-    per_page = 100  # Maximum items per page available on the API.
-    
-    while True:
-        url = f"https://www.balldontlie.io/api/v1/players?page={page}&per_page={per_page}"
-        response = requests.get(url)
+    semaphore = asyncio.Semaphore(concurrency)
+    params = lambda page: {"page": page, "per_page": NBA_PER_PAGE}
+    first = await _get(NBA_PLAYERS_URL, semaphore, params(1))
+    if first.status_code != 200:
+        print("Error fetching NBA players on page 1")
+        return []
+
+    data = first.json()
+    total_pages = data.get("meta", {}).get("total_pages", 0)
+    rest = await asyncio.gather(*(
+        _get(NBA_PLAYERS_URL, semaphore, params(page)) for page in range(2, total_pages + 1)
+    ))
+    records = list(data.get("data", []))
+    for page, response in enumerate(rest, start=2):
         if response.status_code != 200:
             print(f"Error fetching NBA players on page {page}")
             break
+        records.extend(response.json().get("data", []))
+    return records
+
+def _nba_payloads(records: Iterable[Dict]) -> Iterator[dict]:
+    for player in records:
+        # Combine first and last names for a full name.
+        full_name = f"{player.get('first_name', '')} {player.get('last_name', '')}".strip()
+        team_info = player.get("team", {})
+        team_name = team_info.get("full_name", "Unknown Team")
         
-        data = response.json()
-        for player in data.get("data", []):
-            # Combine first and last names for a full name.
-            full_name = f"{player.get('first_name', '')} {player.get('last_name', '')}".strip()
-            team_info = player.get("team", {})
-            team_name = team_info.get("full_name", "Unknown Team")
-            
-            # Get or create team ID
-            team_id = get_or_create_team_id(team_name, team_info)
-            
-            # The API may not provide a position for all players.
-            position = player.get("position") or None
+        # Get or create team ID
+        team_id = get_or_create_team_id(team_name, team_info)
+        
+        # The API may not provide a position for all players.
+        position = player.get("position") or None
 
-            # Package additional details into a JSON string.
-            details = json.dumps({
-                "player_id": player.get("id"),
-                "team_abbreviation": team_info.get("abbreviation"),
-                "city": team_info.get("city"),
-                "conference": team_info.get("conference"),
-                "division": team_info.get("division")
-            })
+        # Package additional details into a JSON string.
+        details = json.dumps({
+            "player_id": player.get("id"),
+            "team_abbreviation": team_info.get("abbreviation"),
+            "city": team_info.get("city"),
+            "conference": team_info.get("conference"),
+            "division": team_info.get("division")
+        })
 
-            players.append(PlayerPayload(
-                name=full_name,
-                team_id=team_id,
-                position=position,
-                details=details
-            ))
-        
-        # Check pagination info.
-        meta = data.get("meta", {})
-        if page >= meta.get("total_pages", 0):
-            break
-        page += 1
-    
-    print(f"Fetched {len(players)} NBA players")
-    return players
+        yield {
+            "name": full_name,
+            "team_id": team_id,
+            "position": position,
+            "details": details
+        }
+
+def build_nba_players(records: Iterable[Dict]) -> Iterator[PlayerPayload]:
+    """
+    Turn balldontlie records into payloads as they are consumed, assigning team
+    IDs in record order
+    """
+    return _validated(_nba_payloads(records), "NBA")
+
+def fetch_nba_players() -> List[PlayerPayload]:
+    """Fetch and build all NBA players"""
+    return list(build_nba_players(asyncio.run(fetch_nba_pages())))
 
 # ---------------------------
 # Function to Fetch G-League Players from TheSportsDB API
 # ---------------------------
-def fetch_gleague_players() -> List[PlayerPayload]:
+async def fetch_gleague_rosters(concurrency: int = GLEAGUE_CONCURRENCY) -> List[tuple]:
     """
-    Uses TheSportsDB API to fetch player data for each G-League team.
+    Uses TheSportsDB API to fetch player data for each G-League team concurrently.
     The endpoint used is 'searchplayers.php' which requires a team name.
     The free API key '1' is used (as provided by TheSportsDB for testing).
+
+    Returns:
+        List[tuple]: (team name, raw player records) in GLEAGUE_TEAM_NAMES order,
+            skipping teams whose request failed
     """
-    players: List[PlayerPayload] = []
-    
-    # Representative list of NBA G-League team names.
-    gleague_team_names = [
-        "Austin Spurs",
-        "Long Island Nets",
-        "Raptors 905",
-        "Grand Rapids Drive",
-        "Lakeland Magic",
-        "Salt Lake City Stars",
-        "South Bay Lakers",
-        "Maine Red Claws",
-        "Fort Wayne Mad Ants",
-        "Capitanes de Ciudad de México",
-        "Westchester Knicks",
-        "Wisconsin Herd",
-        "College Park Skyhawks",
-        "Delaware Blue Coats",
-        "Sioux Falls Skyforce"
-    ]
-    
-    base_url = "https://www.thesportsdb.com/api/v1/json/1/searchplayers.php"
-    for team in gleague_team_names:
-        params = {"t": team}
-        response = requests.get(base_url, params=params)
+    semaphore = asyncio.Semaphore(concurrency)
+    responses = await asyncio.gather(*(
+        _get(GLEAGUE_PLAYERS_URL, semaphore, {"t": team}) for team in GLEAGUE_TEAM_NAMES
+    ))
+    rosters = []
+    for team, response in zip(GLEAGUE_TEAM_NAMES, responses):
         if response.status_code != 200:
             print(f"Error fetching G-League players for team {team}")
             continue
-        
         data = response.json()
         # The key "player" holds the list of players for the team.
-        if data and data.get("player"):
-            for player in data["player"]:
-                full_name = player.get("strPlayer")
-                # Get or create team ID
-                team_id = get_or_create_team_id(team)
-                # Position information might be available.
-                position = player.get("strPosition") or None
-                # Package additional details into a JSON string.
-                details = json.dumps({
-                    "id": player.get("idPlayer"),
-                    "dateBorn": player.get("dateBorn"),
-                    "nationality": player.get("strNationality"),
-                    "description": player.get("strDescriptionEN")
-                })
-                players.append(PlayerPayload(
-                    name=full_name,
-                    team_id=team_id,
-                    position=position,
-                    details=details
-                ))
-    
-    print(f"Fetched {len(players)} G-League players")
-    return players
+        rosters.append((team, (data or {}).get("player") or []))
+    return rosters
+
+def _gleague_payloads(rosters: Iterable[tuple]) -> Iterator[dict]:
+    for team, roster in rosters:
+        for player in roster:
+            full_name = player.get("strPlayer")
+            # Get or create team ID
+            team_id = get_or_create_team_id(team)
+            # Position information might be available.
+            position = player.get("strPosition") or None
+            # Package additional details into a JSON string.
+            details = json.dumps({
+                "id": player.get("idPlayer"),
+                "dateBorn": player.get("dateBorn"),
+                "nationality": player.get("strNationality"),
+                "description": player.get("strDescriptionEN")
+            })
+            yield {
+                "name": full_name,
+                "team_id": team_id,
+                "position": position,
+                "details": details
+            }
+
+def build_gleague_players(rosters: Iterable[tuple]) -> Iterator[PlayerPayload]:
+    """
+    Turn TheSportsDB rosters into payloads as they are consumed, assigning team
+    IDs in roster order
+    """
+    return _validated(_gleague_payloads(rosters), "G-League")
+
+def fetch_gleague_players() -> List[PlayerPayload]:
+    """Fetch and build all G-League players"""
+    return list(build_gleague_players(asyncio.run(fetch_gleague_rosters())))
+
+# ---------------------------
+# Both Sources Concurrently
+# ---------------------------
+async def fetch_all_players() -> Iterator[PlayerPayload]:
+    """
+    Fetch both sources at once, so a refresh takes about as long as the slower one.
+
+    Payloads are built as the returned iterator is consumed, and team IDs are
+    assigned then, NBA records first and then G-League rosters, each in its
+    own order, so the IDs match a serial run regardless of which responses
+    arrived first. team_cache is complete once the iterator is exhausted.
+    """
+    nba_records, gleague_rosters = await asyncio.gather(fetch_nba_pages(), fetch_gleague_rosters())
+    return itertools.chain(build_nba_players(nba_records), build_gleague_players(gleague_rosters))
 
 # ---------------------------
 # Main Function: Combine and Write JSON Output
 # ---------------------------
 def main():
-    nba_players = fetch_nba_players()
-    gleague_players = fetch_gleague_players()
-    
-    all_players = nba_players + gleague_players
-    
-    # First save teams
-    teams_output = [
-        TeamPayload(
-            id=team_id,
-            name=team_name,
-            abbreviation=None,  # We can add this later if needed
-            city=None,
-            conference=None,
-            division=None
-        ).dict()
+    parser = argparse.ArgumentParser(description="Generate teams and players seed files.")
+    parser.add_argument("--ndjson", action="store_true", help="Write one record per line instead of a JSON array")
+    parser.add_argument("--gzip", action="store_true", help="Compress the seed files")
+    args = parser.parse_args()
+
+    all_players = asyncio.run(fetch_all_players())
+
+    # Players are built, validated and dumped a chunk at a time while the seed
+    # file is written (see cron/scraper/jsonstream.py)
+    players_path = output_path("players_seed", args.ndjson, args.gzip)
+    player_count = write_records(players_path, (
+        player
+        for chunk in _chunks(all_players)
+        for player in dump_batch(chunk)
+    ))
+    print(f"Generated players seed file {players_path} with {player_count} players")
+
+    # Then save teams, which the players above assigned ids to
+    teams_output = validate_batch(TeamPayload, [
+        {
+            "id": team_id,
+            "name": team_name,
+            "abbreviation": None,  # We can add this later if needed
+            "city": None,
+            "conference": None,
+            "division": None
+        }
         for team_name, team_id in team_cache.items()
-    ]
-    
-    with open("teams_seed.json", "w") as f:
-        json.dump(teams_output, f, indent=2)
-    print(f"Generated teams seed file with {len(teams_output)} teams")
-    
-    # Then save players
-    all_players_dict = [player.dict() for player in all_players]
-    with open("players_seed.json", "w") as f:
-        json.dump(all_players_dict, f, indent=2)
-    print(f"Generated players seed file with {len(all_players_dict)} players")
+    ])
+    teams_path = output_path("teams_seed", args.ndjson, args.gzip)
+    write_records(teams_path, dump_batch(teams_output))
+    print(f"Generated teams seed file {teams_path} with {len(teams_output)} teams")
+
+    if _http_cache is not None:
+        print(f"HTTP cache: {_http_cache.summary()}")
 
 if __name__ == "__main__":
     main()
@@ -1,20 +1,123 @@
 import requests
-import json
+import argparse
 import os
+import threading
 import time
-from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from typing import Any, Iterable, List, Dict, Optional, Tuple
 from datetime import datetime
 from dotenv import load_dotenv
 
+from cron.http_cache import HttpCache
+from cron.roster_sync import RosterStore
+from cron.scraper.http_client import HttpClient, get_client
+from cron.scraper.jsonstream import output_path, write_records
+
 load_dotenv()
 
+# Requests per minute allowed by the API plan, and parallel requests in flight
+REQUESTS_PER_MINUTE = int(os.getenv("BALLDONTLIE_REQUESTS_PER_MINUTE", "60"))
+MAX_WORKERS = int(os.getenv("BALLDONTLIE_MAX_WORKERS", "8"))
+MAX_RETRIES = 5          # 429 responses tolerated per request before giving up
+DEFAULT_RETRY_AFTER = 60  # Seconds to back off on a 429 without a Retry-After header
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by all request threads.
+
+    Tokens refill at `rate` per second up to `capacity`; each request takes
+    one. `pause` empties the bucket and holds every thread back, which is how
+    a Retry-After from the server is applied to the whole client.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a request may be sent"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out tokens for `seconds`"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0
+
+
+def _retry_after(response: requests.Response) -> float:
+    """Seconds to wait from a Retry-After header (delay or HTTP date)"""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return DEFAULT_RETRY_AFTER
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now().astimezone()).total_seconds())
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
+
+
 class BallDontLieAPI:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, requests_per_minute: int = REQUESTS_PER_MINUTE,
+                 max_workers: int = MAX_WORKERS, cache: Optional[HttpCache] = None,
+                 client: Optional[HttpClient] = None):
         self.base_url = "https://api.balldontlie.io/v1"
         self.api_key = api_key
         self.headers = {
             "Authorization": self.api_key
         }
+        self.max_workers = max_workers
+        self.cache = cache
+        self.limiter = TokenBucket(requests_per_minute / 60)
+        # Keep-alive pool shared by all worker threads; its size should cover max_workers
+        self.client = client or get_client()
+
+    def _request(self, url: str, params: Optional[Dict], headers: Dict[str, str]) -> requests.Response:
+        """
+        Send a GET within the rate limit.
+
+        A 429 pauses every thread for the server's Retry-After before retrying.
+        The client's own retries of failed attempts take a token each as well.
+        """
+        for _ in range(MAX_RETRIES + 1):
+            response = self.client.get(url, headers=headers, params=params, before_attempt=self.limiter.acquire)
+            if response.status_code == 429:
+                delay = _retry_after(response)
+                print(f"Rate limit hit, pausing requests for {delay:.0f} seconds...")
+                self.limiter.pause(delay)
+                continue
+            return response
+        raise Exception(f"API request to {url} still rate limited after {MAX_RETRIES} retries")
+
+    def _get(self, path: str, params: Optional[Dict] = None) -> Dict:
+        """GET an API path, through the response cache when there is one"""
+        url = f"{self.base_url}/{path}"
+        if self.cache is not None:
+            # Fresh cache hits skip the rate limiter and use none of the quota
+            response = self.cache.get(url, params, self.headers, fetch=self._request)
+        else:
+            response = self._request(url, params, self.headers)
+        if response.status_code != 200:
+            raise Exception(f"API request failed with status code {response.status_code}: {response.text}")
+        return response.json()
 
     def get_all_teams(self) -> List[Dict]:
         """
@@ -23,15 +126,101 @@ class BallDontLieAPI:
         Returns:
             List[Dict]: List of team dictionaries
         """
-        response = requests.get(
-            f"{self.base_url}/teams",
-            headers=self.headers
-        )
-        
-        if response.status_code != 200:
-            raise Exception(f"API request failed with status code {response.status_code}: {response.text}")
+        return self._get("teams").get("data", [])
+
+    def _players_page(self, team_id: int, page: int, per_page: int) -> Dict:
+        params = {
+            "per_page": per_page,
+            "page": page,
+            "team_ids[]": team_id
+        }
+        return self._get("players", params)
+
+    def _remaining_pages(self, team_id: int, per_page: int) -> Tuple[List[Dict], Optional[Exception]]:
+        """
+        Players on every page after the first, walked one page at a time.
+
+        Returns:
+            Tuple[List[Dict], Optional[Exception]]: The players fetched, and the
+                error that stopped the walk early (None if it reached the end)
+        """
+        players = []
+        page = 2
+        while True:
+            try:
+                players_page = self._players_page(team_id, page, per_page).get("data", [])
+            except Exception as e:
+                return players, e
+            if not players_page:
+                return players, None
+            players.extend(players_page)
+            page += 1
+
+    def get_players_for_teams(self, team_ids: List[int], per_page: int = 100) -> Dict[int, List[Dict]]:
+        """
+        Retrieve all players for several teams concurrently.
+
+        First pages of every team are fetched in parallel. When the API reports
+        a page count the remaining pages are fetched in parallel too; otherwise
+        each team's remaining pages are walked in order, alongside the other
+        teams. All requests share the client's rate limiter.
         
-        return response.json().get("data", [])
+        Args:
+            team_ids (List[int]): The IDs of the teams
+            per_page (int): Number of results per page (max 100)
+            
+        Returns:
+            Dict[int, List[Dict]]: Players per team ID, in page order. A team whose
+                fetch fails keeps the players retrieved before the error, and the
+                teams left incomplete are reported at the end.
+        """
+        results: Dict[int, List[Dict]] = {team_id: [] for team_id in team_ids}
+        failed = set()
+
+        def first_page(team_id: int) -> Optional[Dict]:
+            try:
+                return self._players_page(team_id, 1, per_page)
+            except Exception as e:
+                print(f"Error fetching players for team {team_id}: {str(e)}")
+                failed.add(team_id)
+                return None
+
+        def page_or_walk(task: Tuple[int, Optional[int]]) -> List[Dict]:
+            team_id, page = task
+            if page is None:
+                players, error = self._remaining_pages(team_id, per_page)
+            else:
+                try:
+                    players, error = self._players_page(team_id, page, per_page).get("data", []), None
+                except Exception as e:
+                    players, error = [], e
+            if error is not None:
+                print(f"Error fetching players for team {team_id}: {str(error)}")
+                failed.add(team_id)
+            return players
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            firsts = dict(zip(team_ids, executor.map(first_page, team_ids)))
+
+            tasks = []
+            for team_id, first in firsts.items():
+                if not first or not first.get("data"):
+                    continue
+                results[team_id].extend(first["data"])
+                total_pages = first.get("meta", {}).get("total_pages")
+                if total_pages is not None:
+                    tasks.extend((team_id, page) for page in range(2, total_pages + 1))
+                else:
+                    tasks.append((team_id, None))
+
+            # map() keeps submission order, so pages land in page order per team
+            for (team_id, _), players in zip(tasks, executor.map(page_or_walk, tasks)):
+                results[team_id].extend(players)
+
+        if failed:
+            print(f"Players may be incomplete for {len(failed)} teams: "
+                  f"{', '.join(str(team_id) for team_id in sorted(failed))}")
+        return results
 
     def get_players_by_team(self, team_id: int, per_page: int = 100) -> List[Dict]:
         """
@@ -44,72 +233,49 @@ class BallDontLieAPI:
         Returns:
             List[Dict]: List of player dictionaries
         """
-        all_players = []
-        page = 1
-        
-        while True:
-            params = {
-                "per_page": per_page,
-                "page": page,
-                "team_ids[]": team_id
-            }
-            
-            try:
-                response = requests.get(
-                    f"{self.base_url}/players",
-                    headers=self.headers,
-                    params=params
-                )
-                
-                # Handle rate limiting
-                if response.status_code == 429:
-                    print(f"Rate limit hit, waiting 60 seconds...")
-                    time.sleep(60)
-                    continue
-                
-                if response.status_code != 200:
-                    raise Exception(f"API request failed with status code {response.status_code}: {response.text}")
-                
-                data = response.json()
-                players = data.get("data", [])
-                
-                if not players:
-                    break
-
-                print(f"Found {players}")
-                    
-                all_players.extend(players)
-                page += 1
-                
-                # Add a small delay between requests to be nice to the API
-                time.sleep(1)
-                
-            except Exception as e:
-                print(f"Error fetching players for team {team_id}: {str(e)}")
-                break
-            
-        return all_players
-
-def save_data_to_file(data: Dict, filename: str):
-    """Save data to a JSON file with timestamp."""
-    output_data = {
-        "timestamp": datetime.now().isoformat(),
-        "data": data
-    }
-    
-    with open(filename, 'w') as f:
-        json.dump(output_data, f, indent=2)
-    
-    print(f"Saved data to {filename}")
+        return self.get_players_for_teams([team_id], per_page)[team_id]
+
+def save_data_to_file(data: Iterable[Any], filename: str) -> int:
+    """
+    Save records to a file with a timestamp, writing them as they are produced.
+
+    The file is a compact {"timestamp", "data": [...]} document, or NDJSON when
+    the name ends in .ndjson; a .gz suffix compresses it (see cron/scraper/jsonstream.py).
+
+    Returns:
+        int: Number of records written
+    """
+    count = write_records(filename, data, envelope={"timestamp": datetime.now().isoformat()})
+    print(f"Saved {count} records to {filename}")
+    return count
+
+def sync_to_database(path: str, teams: List[Dict], players: Iterable[Dict]) -> None:
+    """Upsert only the teams and players that changed since the last sync (see cron/roster_sync.py)"""
+    store = RosterStore(path)
+    try:
+        previous = store.last_sync()
+        if previous:
+            print(f"Last sync: {previous['synced_at']} ({previous['changed']} players changed)")
+        for table, result in store.sync(teams, players).items():
+            print(f"{table}: {result.rows} rows, {result.inserted} inserted, {result.updated} updated")
+    finally:
+        store.close()
 
 def main():
+    parser = argparse.ArgumentParser(description="Download balldontlie teams and players.")
+    parser.add_argument("--ndjson", action="store_true", help="Write one record per line instead of a JSON array")
+    parser.add_argument("--gzip", action="store_true", help="Compress the output files")
+    parser.add_argument("--sync-db", help="Upsert changed teams and players into this SQLite file "
+                                          "instead of writing JSON files")
+    args = parser.parse_args()
+
     # Get API key from environment variable
     api_key = os.getenv("BALLDONTLIE_API_KEY")
     if not api_key:
         raise ValueError("Please set the BALLDONTLIE_API_KEY environment variable")
     
-    # Initialize API client
-    api = BallDontLieAPI(api_key)
+    # Initialize API client; responses are cached on disk between runs
+    api = BallDontLieAPI(api_key, cache=HttpCache.from_env())
     
     try:
         # First get all teams
@@ -117,29 +283,30 @@ def main():
         teams = api.get_all_teams()
         print(f"Successfully retrieved {len(teams)} teams")
         
-        # Save teams data
-        save_data_to_file(teams, "teams_data.json")
+        # Save teams data; in sync mode they are stored with the players below
+        if not args.sync_db:
+            save_data_to_file(teams, output_path("teams_data", args.ndjson, args.gzip))
         
-        # Now get players for each team
-        print("\nFetching players for each team...")
-        all_players = []
+        # Now get players for every team, several requests at a time
+        print(f"\nFetching players for {len(teams)} teams...")
+        players_by_team = api.get_players_for_teams([team["id"] for team in teams])
         
         for team in teams:
-            team_id = team["id"]
-            team_name = team["full_name"]
-            print(f"\nFetching players for {team_name} (ID: {team_id})...")
-            
-            team_players = api.get_players_by_team(team_id)
-            all_players.extend(team_players)
-            
-            print(f"Found {len(team_players)} players for {team_name}")
+            print(f"Found {len(players_by_team[team['id']])} players for {team['full_name']}")
         
-        # Save all players data
-        print(f"\nTotal players found: {len(all_players)}")
-        save_data_to_file(all_players, "players_data.json")
+        # Save all players data, streamed team by team
+        print(f"\nTotal players found: {sum(len(players) for players in players_by_team.values())}")
+        all_players = (player for team in teams for player in players_by_team[team["id"]])
+        if args.sync_db:
+            sync_to_database(args.sync_db, teams, all_players)
+        else:
+            save_data_to_file(all_players, output_path("players_data", args.ndjson, args.gzip))
         
     except Exception as e:
         print(f"Error occurred: {str(e)}")
 
+    if api.cache is not None:
+        print(f"HTTP cache: {api.cache.summary()}")
+
 if __name__ == "__main__":
     main() 
\ No newline at end of file